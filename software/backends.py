@@ -0,0 +1,155 @@
+import os
+import time
+import numpy as np
+
+
+# 本地转换的识别模型（paddle2onnx 导出，输入为 [N, 3, 48, W] 动态宽度）
+ONNX_REC_MODEL = 'model/rec/en_PP-OCRv4_rec_onnx/model.onnx'
+ONNX_DET_MODEL = 'model/det/en_PP-OCRv3_det_onnx/model.onnx'
+# OpenVINO 可直接读取 ONNX，若已用 ovc 转为 IR 则优先使用
+OPENVINO_REC_MODEL = 'model/rec/en_PP-OCRv4_rec_openvino/model.xml'
+# model_variants.py quantize 生成的 INT8 识别模型
+INT8_REC_MODEL = 'model/rec/en_PP-OCRv4_rec_int8/model.onnx'
+DEFAULT_IMAGE_SHAPE = (3, 48, 320)
+BACKENDS = ("paddle", "onnx", "openvino")
+# 识别模型变体，可按工位选择（station.json 的 rec_variant）
+# backend 为 None 时沿用读数器的后端；image_shape 的宽度为批内最小补齐宽度
+REC_VARIANTS = {
+    "fp32": {"backend": None, "model": None, "image_shape": (3, 48, 320)},
+    "int8": {"backend": "onnx", "model": INT8_REC_MODEL, "image_shape": (3, 48, 320)},
+}
+
+
+class PaddlePredictorBackend():
+    """复用 PaddleOCR 已加载的识别预测器"""
+
+    name = "paddle"
+
+    def __init__(self, text_recognizer):
+        self.text_recognizer = text_recognizer
+        self.image_shape = tuple(getattr(text_recognizer, 'rec_image_shape', DEFAULT_IMAGE_SHAPE))
+
+    def run(self, batch):
+        recognizer = self.text_recognizer
+        recognizer.input_tensor.copy_from_cpu(batch)
+        recognizer.predictor.run()
+        return recognizer.output_tensors[0].copy_to_cpu()
+
+
+class OnnxBackend():
+    """ONNX Runtime CPU 推理"""
+
+    name = "onnx"
+
+    def __init__(self, model_path, threads=None, image_shape=DEFAULT_IMAGE_SHAPE, session=None):
+        if session is None:
+            try:
+                import onnxruntime
+            except ImportError:
+                raise RuntimeError("未安装 onnxruntime，无法使用 onnx 推理后端")
+            options = onnxruntime.SessionOptions()
+            if threads:
+                options.intra_op_num_threads = threads
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            try:
+                session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+            except Exception as e:
+                # onnxruntime 的加载错误（文件缺失、图无效等）不继承 RuntimeError，统一转换
+                raise RuntimeError(f"无法加载 ONNX 模型 {model_path}: {e}") from e
+        self.session = session
+        self.input_name = self.session.get_inputs()[0].name
+        self.image_shape = tuple(image_shape)
+
+    def run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoBackend():
+    """OpenVINO CPU 推理，模型为 IR (.xml) 或 ONNX"""
+
+    name = "openvino"
+
+    def __init__(self, model_path, threads=None, image_shape=DEFAULT_IMAGE_SHAPE):
+        try:
+            import openvino
+        except ImportError:
+            raise RuntimeError("未安装 openvino，无法使用 openvino 推理后端")
+        config = {"INFERENCE_NUM_THREADS": threads} if threads else {}
+        core = openvino.Core()
+        try:
+            self.model = core.compile_model(core.read_model(model_path), "CPU", config)
+        except Exception as e:
+            raise RuntimeError(f"无法加载 OpenVINO 模型 {model_path}: {e}") from e
+        self.output = self.model.output(0)
+        self.image_shape = tuple(image_shape)
+
+    def run(self, batch):
+        return self.model([batch])[self.output]
+
+
+def shared_onnx_session(text_recognizer, loaded_model, model_path):
+    """PaddleOCR 以 use_onnx 加载了同一个识别模型时返回其 ONNX Runtime 会话，否则返回 None"""
+    if text_recognizer is None or not getattr(text_recognizer, 'use_onnx', False) or not loaded_model:
+        return None
+    if os.path.abspath(loaded_model) != os.path.abspath(model_path):
+        return None
+    return getattr(text_recognizer, 'predictor', None)
+
+
+def make_rec_backend(kind, text_recognizer=None, threads=None, model_root=".", model=None, loaded_model=None):
+    """按名称创建识别推理后端；model_root 为 model 目录所在位置，model 可指定其它模型文件
+
+    loaded_model 为 PaddleOCR 已加载的识别模型路径，onnx 后端与之相同时复用其会话，不重复加载。
+    """
+    if kind == "paddle":
+        if text_recognizer is None or not hasattr(text_recognizer, 'predictor'):
+            raise RuntimeError("当前 PaddleOCR 版本不支持直接调用识别模型")
+        return PaddlePredictorBackend(text_recognizer)
+    if kind == "onnx":
+        model_path = os.path.join(model_root, model or ONNX_REC_MODEL)
+        return OnnxBackend(model_path, threads,
+                           session=shared_onnx_session(text_recognizer, loaded_model, model_path))
+    if kind == "openvino":
+        model_path = os.path.join(model_root, model or OPENVINO_REC_MODEL)
+        if model is None and not os.path.exists(model_path):
+            model_path = os.path.join(model_root, ONNX_REC_MODEL)
+        return OpenVinoBackend(model_path, threads)
+    raise ValueError(f"未知的推理后端: {kind}")
+
+
+def make_rec_variant(name, kind="paddle", text_recognizer=None, threads=None, model_root=".", loaded_model=None):
+    """按 REC_VARIANTS 创建识别推理后端"""
+    if name not in REC_VARIANTS:
+        raise ValueError(f"未知的识别模型变体: {name}")
+    variant = REC_VARIANTS[name]
+    model = variant["model"]
+    if model and not os.path.exists(os.path.join(model_root, model)):
+        raise RuntimeError(f"缺少模型文件 {model}，请先运行 model_variants.py quantize")
+    backend = make_rec_backend(variant["backend"] or kind, text_recognizer, threads, model_root, model, loaded_model)
+    backend.image_shape = tuple(variant["image_shape"])
+    return backend
+
+
+def compare_backends(backends, batch, repeat=20):
+    """同一批输入在各后端上的输出差异和耗时
+
+    以第一个后端为参照，返回 [(名称, 中位耗时 ms, 输出最大绝对误差, 逐列 argmax 一致率)]。
+    """
+    results = []
+    reference = None
+    for backend in backends:
+        output = backend.run(batch)  # 预热
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            backend.run(batch)
+            samples.append((time.perf_counter() - start) * 1000)
+        if reference is None:
+            reference = output
+        if output.shape != reference.shape:
+            results.append((backend.name, float(np.median(samples)), float("inf"), 0.0))
+            continue
+        error = float(np.abs(output - reference).max())
+        agreement = float((output.argmax(axis=2) == reference.argmax(axis=2)).mean())
+        results.append((backend.name, float(np.median(samples)), error, agreement))
+    return results
@@ -0,0 +1,35 @@
+class AdaptiveBatchSizer():
+    """按实测单帧耗时选择每批帧数，使一批处理落在上报周期内
+
+    每批结束后用 update() 记录帧数和总耗时（含等待取帧），对单帧耗时做指数平滑；
+    next_size() 取预算内能完成的最大帧数，不少于 min_frames（保证中值有效），
+    不多于 max_frames。
+    """
+
+    def __init__(self, budget=0.8, min_frames=3, max_frames=10, smoothing=0.3, initial_frames=5):
+        self.budget = budget  # 每批可用时间（秒），为 1 秒节拍留出界面刷新余量
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+        self.smoothing = smoothing
+        self.frame_time = None  # 平滑后的单帧耗时（秒）
+        self.batch_size = initial_frames
+
+    def update(self, frames, seconds):
+        if frames <= 0:
+            return
+        frame_time = seconds / frames
+        if self.frame_time is None:
+            self.frame_time = frame_time
+        else:
+            self.frame_time += self.smoothing * (frame_time - self.frame_time)
+
+    def next_size(self, budget=None):
+        budget = self.budget if budget is None else budget
+        if self.frame_time:
+            size = int(budget / self.frame_time)
+            self.batch_size = max(self.min_frames, min(self.max_frames, size))
+        return self.batch_size
+
+    def stats(self):
+        return {"batch_size": self.batch_size,
+                "frame_ms": round(self.frame_time * 1000, 1) if self.frame_time else None}
@@ -0,0 +1,486 @@
+import argparse
+import json
+import os
+import time
+import cv2
+import numpy as np
+from preprocess import RedSegmentFilter, reference_binarize
+from change_gate import ChannelChangeGate
+from seven_segment import SevenSegmentDecoder, render_digits
+from detectors import ComponentDetector, NeuralDetector, box_iou, rect_to_box
+from box_order import order_boxes, reference_sort_boxes
+from reading_parser import ReadingParser, reference_parse_reading
+from glyph_cache import GlyphCache
+from replay import ReplaySource
+from synthetic import SyntheticMeters, SyntheticSource, format_value
+from quality import FrameQualityGate, suggest_thresholds
+from station import update_station_config
+
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+
+def time_call(func, *args, repeat=50):
+    """多次调用取中位数耗时（毫秒）"""
+    func(*args)  # 预热
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def make_test_frame(width, height, seed=0):
+    """随机背景上叠加红色块和白色块"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 80, (height, width, 3), dtype=np.uint8)
+    frame[height // 4:height // 2, width // 8:width // 2] = (30, 30, 220)
+    frame[height // 2:height * 3 // 4, width // 2:width * 7 // 8] = (235, 240, 245)
+    return frame
+
+
+def load_frames(path):
+    """递归读取采集目录中的图片和 avi 模式录制的视频"""
+    frames = []
+    for root, _, files in os.walk(path):
+        for file in sorted(files):
+            if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')):
+                frame = cv2.imread(os.path.join(root, file))
+                if frame is not None:
+                    frames.append(frame)
+            elif file.lower().endswith('.avi'):
+                video = cv2.VideoCapture(os.path.join(root, file))
+                ok, frame = video.read()
+                while ok:
+                    frames.append(frame)
+                    ok, frame = video.read()
+                video.release()
+    return frames
+
+
+def box_recall(references, boxes, iou_threshold):
+    """参考框中被检测框命中（IoU 达到阈值）的比例"""
+    if not references:
+        return 1.0
+    hits = sum(1 for ref in references if any(box_iou(ref, box) >= iou_threshold for box in boxes))
+    return hits / len(references)
+
+
+def bench_detect(repeat, frames_dir=None, iou_threshold=0.3):
+    """连通域定位与 DB 文本检测的速度和召回率
+
+    给出采集目录时以 DB 检测结果为参考（需要 PaddleOCR），否则使用合成帧的真值框。
+    """
+    red_filter = RedSegmentFilter()
+    detectors = [ComponentDetector()]
+    if frames_dir:
+        from ocr_capture_worker import create_ocr
+        detectors.append(NeuralDetector(create_ocr()))
+        binaries = [red_filter(frame).copy() for frame in load_frames(frames_dir)]
+        references = [detectors[1](binary) for binary in binaries]
+    else:
+        rng = np.random.default_rng(0)
+        meters = SyntheticMeters(meters=4)
+        binaries = []
+        references = []
+        for _ in range(20):
+            frame, truth = meters.render([f"{value:.2f}" for value in rng.uniform(0, 40, 4)])
+            binaries.append(red_filter(frame).copy())
+            references.append(truth["boxes"])
+    if not binaries:
+        print("没有可用的帧")
+        return
+
+    print(f"帧数 {len(binaries)}，参考框 {'DB 检测' if frames_dir else '合成真值'}")
+    print(f"{'检测器':>10} {'单帧(ms)':>10} {'召回率':>8}")
+    for detector in detectors:
+        elapsed = time_call(lambda: [detector(binary) for binary in binaries], repeat=repeat)
+        recalls = [box_recall(refs, detector(binary), iou_threshold)
+                   for binary, refs in zip(binaries, references)]
+        print(f"{detector.name:>10} {elapsed / len(binaries):>10.2f} {np.mean(recalls):>8.1%}")
+
+
+def bench_gate(frames=300, change_every=30):
+    """稳定读数场景下通道门控的跳过比例，并检查读数变化是否全部被识别"""
+    red_filter = RedSegmentFilter()
+    gate = ChannelChangeGate()
+    missed = 0
+    values = [1.23, 4.56, 7.89, 0.12]
+    meters = SyntheticMeters(meters=4)
+    for index in range(frames):
+        if index and index % change_every == 0:
+            values = [round(v + 0.01 * (channel + 1), 2) for channel, v in enumerate(values)]
+        frame, truth = meters.render([f"{v:.2f}" for v in values])
+        boxes = truth["boxes"]
+        binary = red_filter(frame)
+        signatures = []
+        for box in boxes:
+            (x0, y0), (x1, y1) = box[0].astype(int), box[2].astype(int)
+            signatures.append(gate.signature(binary[y0:y1, x0:x1]))
+        if gate.boxes is None:
+            gate.count_processed(len(boxes))
+            gate.track(boxes, signatures, values)
+            continue
+        for channel, signature in enumerate(signatures):
+            reading = gate.lookup(channel, signature)
+            if reading is None:
+                gate.update(channel, signature, values[channel])
+            elif reading != values[channel]:
+                missed += 1
+    stats = gate.stats()
+    print(f"帧数 {frames}，每 {change_every} 帧变化一次")
+    print(f"跳过 {stats['skipped']}，识别 {stats['processed']}，跳过比例 {stats['skip_ratio']:.1%}，漏检变化 {missed}")
+
+
+def bench_segment(repeat):
+    """七段数码管解码的准确率和单通道耗时"""
+    rng = np.random.default_rng(0)
+    texts = [f"{value:.2f}" for value in rng.uniform(0, 40, 50)]
+    decoder = SevenSegmentDecoder()
+    print(f"{'字高':>6} {'准确率':>8} {'回退率':>8} {'单通道(ms)':>12}")
+    for height in (24, 32, 48, 64):
+        crops = [render_digits(text, height) for text in texts]
+        correct = 0
+        fallback = 0
+        for text, crop in zip(texts, crops):
+            result = decoder.read(crop)
+            if result is None:
+                fallback += 1
+            elif result[0] == text:
+                correct += 1
+        elapsed = time_call(lambda: [decoder.decode(crop) for crop in crops], repeat=repeat)
+        print(f"{height:>6} {correct / len(texts):>8.1%} {fallback / len(texts):>8.1%} "
+              f"{elapsed / len(crops):>12.3f}")
+
+
+def make_noisy_boxes(count, seed=0):
+    """2x2 通道读数框加上随机的小型误检框"""
+    rng = np.random.default_rng(seed)
+    boxes = [rect_to_box(x, y, x + 160, y + 50) for y in (80, 320) for x in (40, 360)]
+    for _ in range(count - len(boxes)):
+        x, y = rng.uniform(0, 600), rng.uniform(0, 440)
+        w, h = rng.uniform(10, 60), rng.uniform(10, 40)
+        boxes.append(rect_to_box(x, y, x + w, y + h))
+    order = rng.permutation(len(boxes))
+    return [boxes[i] for i in order[:count]]
+
+
+def reference_order(boxes):
+    """原始流程：排序后用 np.array_equal 把框映射回下标"""
+    sorted_boxes = reference_sort_boxes(boxes)
+    return [i for sb in sorted_boxes for i, box in enumerate(boxes) if np.array_equal(sb, box)]
+
+
+def bench_sort(repeat):
+    """排序与通道映射：原始实现与向量化实现"""
+    print(f"{'框数':>6} {'原始(ms)':>10} {'向量化(ms)':>12} {'加速比':>8}")
+    for count in (4, 10, 25, 50, 100, 200):
+        boxes = make_noisy_boxes(count)
+        if count == 4 and list(order_boxes(boxes)) != reference_order(boxes):
+            raise AssertionError("通道顺序与原始实现不一致")
+        before = time_call(reference_order, boxes, repeat=repeat)
+        after = time_call(order_boxes, boxes, repeat=repeat)
+        print(f"{count:>6} {before:>10.3f} {after:>12.3f} {before / after:>7.1f}x")
+
+
+def bench_parse(repeat):
+    """读数解析：链式 replace 与 str.translate"""
+    texts = ["1.23", "12.34", "l2.3O", "O.SB", "4,56", "IZ.34", "-1.02", "abc", "7T.1"] * 100
+    parser = ReadingParser()
+    for text in texts:
+        parsed = parser.parse(text)
+        if text[0] != '-' and (parsed[0] if parsed else None) != reference_parse_reading(text):
+            raise AssertionError(f"{text} 解析结果与原始实现不一致")
+    before = time_call(lambda: [reference_parse_reading(text) for text in texts], repeat=repeat)
+    after = time_call(lambda: [parser.parse(text, 0.9) for text in texts], repeat=repeat)
+    print(f"{len(texts)} 条文本：原始 {before:.3f} ms，translate {after:.3f} ms，加速 {before / after:.1f}x")
+
+
+def box_crop(binary, box):
+    """四点框外接矩形裁剪"""
+    x0, y0 = np.floor(np.min(box, axis=0)).astype(int)
+    x1, y1 = np.ceil(np.max(box, axis=0)).astype(int)
+    return binary[max(0, y0):y1, max(0, x0):x1]
+
+
+def bench_glyph(repeat, frames_dir=None):
+    """字形缓存：命中率、命中结果与识别结果的一致率、查表耗时
+
+    给出采集目录时用 ReplaySource 回放，PaddleOCR 识别结果作为参照；
+    否则用随机游走的合成读数（字高随机变化），真值作为参照。
+    """
+    samples = []
+    if frames_dir:
+        from ocr_capture_worker import create_ocr
+        ocr = create_ocr()
+        source = ReplaySource(frames_dir, pacing="fast")
+        red_filter = RedSegmentFilter()
+        detector = ComponentDetector()
+        while True:
+            frame, _ = source.read_frame()
+            if frame is None:
+                break
+            binary = red_filter(frame)
+            samples.extend(box_crop(binary, box).copy() for box in detector(binary))
+
+        def recognize(crop):
+            result = ocr.ocr([cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)], det=False, cls=False)
+            return result[0][0] if result and result[0] else ("", 0.0)
+        reference = {id(crop): recognize(crop) for crop in samples}
+    else:
+        rng = np.random.default_rng(0)
+        values = rng.uniform(5, 35, 4)
+        reference = {}
+        for _ in range(300):
+            values = np.clip(values + rng.normal(0, 0.05, 4), 0, 39.99)
+            for value in values:
+                crop = render_digits(f"{value:.2f}", int(rng.integers(44, 53)))
+                samples.append(crop)
+                reference[id(crop)] = (f"{value:.2f}", 1.0)
+    if not samples:
+        print("没有可用的读数区域")
+        return
+
+    cache = GlyphCache()
+    agree = 0
+    for crop in samples:
+        keys = cache.split(crop)
+        hit = cache.lookup(keys)
+        if hit is None:
+            cache.store(keys, *reference[id(crop)])
+        elif hit[0] == reference[id(crop)][0]:
+            agree += 1
+    stats = cache.stats()
+    elapsed = time_call(lambda: [cache.lookup(cache.split(crop)) for crop in samples], repeat=repeat)
+    print(f"读数区域 {len(samples)}，参照 {'PaddleOCR' if frames_dir else '合成真值'}")
+    print(f"命中率 {stats['hit_ratio']:.1%}，命中一致率 {agree / max(1, stats['hits']):.1%}，"
+          f"缓存条目 {stats['size']}，淘汰 {stats['evictions']}")
+    print(f"分割+查表 {elapsed / len(samples):.3f} ms/区域")
+
+
+def bench_backend(repeat, frames_dir=None, threads=None):
+    """各推理后端的识别耗时与输出交叉校验（以 Paddle 为参照）"""
+    from ocr_capture_worker import create_ocr, resource_path
+    from backends import BACKENDS, compare_backends, make_rec_backend
+    from recognizer import CTCDecoder, PaddleRecognizer
+
+    ocr = create_ocr(cpu_threads=threads)
+    backends = []
+    for kind in BACKENDS:
+        try:
+            backends.append(make_rec_backend(kind, getattr(ocr, 'text_recognizer', None), threads,
+                                             resource_path('.')))
+        except Exception as e:
+            print(f"跳过 {kind}: {e}")
+    if not backends:
+        return
+
+    if frames_dir:
+        red_filter = RedSegmentFilter()
+        detector = ComponentDetector()
+        crops = []
+        for frame in load_frames(frames_dir):
+            binary = red_filter(frame)
+            crops.extend(box_crop(binary, box).copy() for box in detector(binary))
+    else:
+        rng = np.random.default_rng(0)
+        crops = [render_digits(f"{value:.2f}", 48) for value in rng.uniform(0, 40, 20)]
+    if not crops:
+        print("没有可用的读数区域")
+        return
+
+    decoder = CTCDecoder(resource_path('model/dict/en_dict.txt'))
+    recognizers = [PaddleRecognizer(backend, decoder) for backend in backends]
+    batch = recognizers[0].preprocess(crops)
+    texts = [[text for text, _ in decoder.decode(backend.run(batch))] for backend in backends]
+    print(f"读数区域 {len(crops)}，线程数 {threads or '默认'}")
+    print(f"{'后端':>10} {'整批(ms)':>10} {'单区域(ms)':>12} {'最大误差':>10} {'argmax一致':>12} {'文本一致':>10}")
+    for (name, elapsed, error, agreement), backend_texts in zip(compare_backends(backends, batch, repeat), texts):
+        same = np.mean([a == b for a, b in zip(backend_texts, texts[0])])
+        print(f"{name:>10} {elapsed:>10.2f} {elapsed / len(crops):>12.3f} {error:>10.2e} "
+              f"{agreement:>12.1%} {same:>10.1%}")
+
+
+def bench_preprocess(repeat):
+    """对比原始预处理与融合预处理"""
+    print(f"{'分辨率':>12} {'原始(ms)':>10} {'融合(ms)':>10} {'加速比':>8}")
+    for width, height in RESOLUTIONS:
+        frame = make_test_frame(width, height)
+        red_filter = RedSegmentFilter()
+        if not np.array_equal(reference_binarize(frame), red_filter(frame)):
+            raise AssertionError(f"{width}x{height} 融合结果与原始结果不一致")
+        before = time_call(reference_binarize, frame, repeat=repeat)
+        after = time_call(red_filter, frame, repeat=repeat)
+        print(f"{f'{width}x{height}':>12} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x")
+
+
+def reading_accuracy(readings, texts, formats):
+    """(整读数正确数, 正确字符数, 字符总数)，缺失的读数按全错计"""
+    exact = correct = total = 0
+    for reading, text, fmt in zip(readings, texts, formats):
+        total += len(text)
+        if reading is None:
+            continue
+        value = reading[0] if isinstance(reading, tuple) else reading
+        read = format_value(value, fmt)
+        exact += read == text
+        correct += sum(a == b for a, b in zip(read.rjust(len(text)), text))
+    return exact, correct, total
+
+
+def measure_quality(frames, gate):
+    """按读数器跟踪时的方式（连通域定位出的各通道区域）测量每帧的画面质量"""
+    red_filter = RedSegmentFilter()
+    detector = ComponentDetector()
+    return [gate.measure(frame, boxes=detector(red_filter(frame))) for frame in frames]
+
+
+def bench_quality(frames_dir=None, station_file=None):
+    """画面质量阈值标定
+
+    给出采集目录时，把其中读数正常的画面作为参照，打印各指标分布和建议阈值，
+    给出 station_file 时写入工位配置的 quality_gate 项。未给出目录时用合成读数演示，
+    并报告建议阈值在各种退化画面上的拒绝比例。
+    """
+    gate = FrameQualityGate()
+    frames = load_frames(frames_dir) if frames_dir else [f for f, _ in SyntheticMeters(seed=1).frames(50)]
+    if not frames:
+        print("没有可用的帧")
+        return None
+    measurements = np.array(measure_quality(frames, gate))
+    print(f"帧数 {len(frames)}，参照 {'采集画面' if frames_dir else '合成读数'}")
+    print(f"{'指标':>10} {'p5':>8} {'p50':>8} {'p95':>8}")
+    for name, column in zip(("清晰度", "饱和比例", "平均亮度"), measurements.T):
+        p5, p50, p95 = np.percentile(column, [5, 50, 95])
+        print(f"{name:>10} {p5:>8.3f} {p50:>8.3f} {p95:>8.3f}")
+    thresholds = suggest_thresholds(measurements)
+    print(f"建议阈值: {thresholds}")
+    if not frames_dir:
+        tuned = FrameQualityGate(**thresholds)
+        for label, degrade in [("正常", {}), ("模糊 sigma=3", {"blur": 3.0}), ("反光 0.8", {"glare": 0.8}),
+                               ("欠曝 0.2", {"exposure": 0.2})]:
+            samples = [f for f, _ in SyntheticMeters(seed=2, **degrade).frames(30)]
+            rejected = sum(tuned.check(frame, boxes=ComponentDetector()(RedSegmentFilter()(frame)))[0] is not None
+                           for frame in samples)
+            print(f"{label:>12} 拒绝 {rejected / len(samples):.0%}")
+    if station_file:
+        update_station_config(station_file, "quality_gate", thresholds)
+        print(f"已写入 {station_file}")
+    return thresholds
+
+
+def bench_pipeline(frames=200, meters=4, fmt=(4, 2), batch_size=5, detector="neural", degrade=None,
+                   output=None):
+    """合成读数上的整条 OCR 流程：帧率、分阶段耗时、读数准确率
+
+    先逐帧调用 process_frame，再通过 SyntheticSource 回放调用 process_batch（读数每 batch_size
+    帧变化一次，批结果与该批真值比较）。准确率由 tests/test_pipeline.py 检查，
+    output 保存的结果 JSON 可用于比较前后两次的帧率。
+    """
+    from ocr_capture_worker import CurrentMeterReader
+
+    generator = SyntheticMeters(meters, fmt, hold=batch_size, seed=0, **(degrade or {}))
+    data = generator.frames(frames)
+    reader = CurrentMeterReader(channel_num=meters, detector=detector, channel_formats=fmt,
+                                source=SyntheticSource([frame for frame, _ in data]), evidence=False)
+    formats = generator.formats
+    # 帧率按稳定状态计算，先显式预热，首次推理开销不计入
+    reader.warm_up()
+
+    exact = correct = total = 0
+    start = time.perf_counter()
+    for frame, truth in data:
+        scores = reading_accuracy(reader.process_frame(frame), truth["texts"], formats)
+        exact, correct, total = exact + scores[0], correct + scores[1], total + scores[2]
+    frame_seconds = time.perf_counter() - start
+    frame_stages = reader.profiler.summary()
+    result = {"frame_fps": frames / frame_seconds, "frame_exact": exact / (frames * meters),
+              "frame_chars": correct / total}
+
+    reader.profiler.reset()
+    batches = frames // batch_size
+    exact = correct = total = 0
+    start = time.perf_counter()
+    for index in range(batches):
+        results = reader.process_batch(batch_size)
+        texts = data[index * batch_size][1]["texts"]
+        scores = reading_accuracy(results or [None] * meters, texts, formats)
+        exact, correct, total = exact + scores[0], correct + scores[1], total + scores[2]
+    batch_seconds = time.perf_counter() - start
+    result.update({"batch_fps": batches * batch_size / batch_seconds, "batch_exact": exact / (batches * meters),
+                   "batch_chars": correct / total})
+    reader.frames.release()
+
+    print(f"合成读数 {frames} 帧，{meters} 个表，格式 {fmt}，退化 {degrade or '无'}，检测 {detector}")
+    print(f"process_frame: {result['frame_fps']:.1f} 帧/秒，整读数准确率 {result['frame_exact']:.1%}，"
+          f"字符准确率 {result['frame_chars']:.1%}")
+    print(f"process_batch: {result['batch_fps']:.1f} 帧/秒，整读数准确率 {result['batch_exact']:.1%}，"
+          f"字符准确率 {result['batch_chars']:.1%}")
+    print(f"{'阶段':>12} {'次数':>6} {'p50(ms)':>9} {'p90(ms)':>9} {'p99(ms)':>9}")
+    for name, (count, p50, p90, p99) in frame_stages.items():
+        print(f"{name:>12} {count:>6} {p50:>9.2f} {p90:>9.2f} {p99:>9.2f}")
+    result["stages"] = {name: round(p50, 3) for name, (_, p50, _, _) in frame_stages.items()}
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCR 流程性能基准")
+    parser.add_argument("--repeat", type=int, default=50)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("preprocess", help="红色数码管预处理")
+    subparsers.add_parser("gate", help="通道变化门控")
+    subparsers.add_parser("segment", help="七段数码管解码")
+    subparsers.add_parser("sort", help="框排序与通道映射")
+    subparsers.add_parser("parse", help="读数解析")
+    detect_parser = subparsers.add_parser("detect", help="连通域定位与 DB 检测对比")
+    detect_parser.add_argument("--frames", help="采集图片目录，如 captures/20250101_120000")
+    backend_parser = subparsers.add_parser("backend", help="识别推理后端耗时与交叉校验")
+    backend_parser.add_argument("--frames", help="采集图片目录，默认使用合成读数")
+    backend_parser.add_argument("--threads", type=int, help="推理线程数")
+    glyph_parser = subparsers.add_parser("glyph", help="字形识别缓存")
+    glyph_parser.add_argument("--frames", help="回放的采集图片目录或视频文件")
+    quality_parser = subparsers.add_parser("quality", help="画面质量阈值标定")
+    quality_parser.add_argument("--frames", help="读数正常的采集图片目录，默认使用合成读数")
+    quality_parser.add_argument("--station", help="把建议阈值写入该工位配置文件")
+    pipeline_parser = subparsers.add_parser("pipeline", help="合成读数上的整条 OCR 流程，可与基线比较")
+    pipeline_parser.add_argument("--frames", type=int, default=200)
+    pipeline_parser.add_argument("--meters", type=int, default=4, help="表的数量 1-16")
+    pipeline_parser.add_argument("--format", default="4,2", help="数字位数,小数位数")
+    pipeline_parser.add_argument("--batch-size", type=int, default=5)
+    pipeline_parser.add_argument("--detector", default="neural", choices=["neural", "component"])
+    pipeline_parser.add_argument("--blur", type=float, default=0.0, help="高斯模糊 sigma")
+    pipeline_parser.add_argument("--noise", type=float, default=4.0, help="噪声标准差")
+    pipeline_parser.add_argument("--glare", type=float, default=0.0, help="反光强度 0-1")
+    pipeline_parser.add_argument("--perspective", type=float, default=0.0, help="角点偏移比例")
+    pipeline_parser.add_argument("--exposure", type=float, default=1.0, help="亮度增益")
+    pipeline_parser.add_argument("--output", help="结果 JSON")
+    args = parser.parse_args()
+
+    if args.command == "preprocess":
+        bench_preprocess(args.repeat)
+    elif args.command == "gate":
+        bench_gate()
+    elif args.command == "segment":
+        bench_segment(args.repeat)
+    elif args.command == "sort":
+        bench_sort(args.repeat)
+    elif args.command == "parse":
+        bench_parse(args.repeat)
+    elif args.command == "detect":
+        bench_detect(args.repeat, args.frames)
+    elif args.command == "backend":
+        bench_backend(args.repeat, args.frames, args.threads)
+    elif args.command == "glyph":
+        bench_glyph(args.repeat, args.frames)
+    elif args.command == "quality":
+        bench_quality(args.frames, args.station)
+    elif args.command == "pipeline":
+        degrade = {"blur": args.blur, "noise": args.noise, "glare": args.glare,
+                   "perspective": args.perspective, "exposure": args.exposure}
+        bench_pipeline(args.frames, args.meters, tuple(int(v) for v in args.format.split(",")), args.batch_size,
+                       args.detector, degrade, args.output)
@@ -0,0 +1,121 @@
+import numpy as np
+
+
+def box_array(boxes):
+    """四点框列表转为 (n, 4, 2) 数组"""
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+
+
+def order_boxes(boxes, row_ratio=0.6, col_ratio=0.8):
+    """按从上到下、从左到右排序，返回框的下标排列
+
+    与 reference_sort_boxes 相同的行列判断（阈值取框高/框宽中位数的比例），
+    但按相邻中心的间隔分组，全部用数组运算完成。
+    """
+    boxes = box_array(boxes)
+    count = len(boxes)
+    if count == 0:
+        return np.empty(0, dtype=np.intp)
+
+    heights = np.abs(boxes[:, 2, 1] - boxes[:, 0, 1])
+    widths = np.abs(boxes[:, 2, 0] - boxes[:, 0, 0])
+    row_thresh = np.sort(heights)[count // 2] * row_ratio
+    col_thresh = np.sort(widths)[count // 2] * col_ratio
+    centers = (boxes[:, 0] + boxes[:, 2]) / 2
+    xs, ys = centers[:, 0], centers[:, 1]
+
+    # 行分组：按 Y 排序后相邻间隔超过阈值处换行
+    by_y = np.argsort(ys, kind="stable")
+    row_of = np.empty(count, dtype=np.intp)
+    row_of[by_y] = np.concatenate(([0], np.cumsum(np.diff(ys[by_y]) > row_thresh)))
+
+    # 列分组：行内按 X 排序后相邻间隔超过阈值处换列，列号全局递增
+    by_row_x = np.lexsort((xs, row_of))
+    new_col = np.diff(xs[by_row_x]) > col_thresh
+    new_col |= np.diff(row_of[by_row_x]) != 0
+    col_of = np.empty(count, dtype=np.intp)
+    col_of[by_row_x] = np.concatenate(([0], np.cumsum(new_col)))
+
+    # 列内按 Y 微调
+    return np.lexsort((ys, col_of))
+
+
+def assign_channels(boxes, channel_centers, max_distance=None):
+    """按固定通道位置分配检测框，返回每个通道对应的框下标（缺失为 -1）
+
+    channel_centers 为各通道中心像素坐标；按距离从近到远贪心匹配，
+    每个框和每个通道最多匹配一次，距离超过 max_distance 的不匹配。
+    """
+    boxes = box_array(boxes)
+    centers = np.asarray(channel_centers, dtype=np.float32).reshape(-1, 2)
+    assigned = np.full(len(centers), -1, dtype=np.intp)
+    if len(boxes) == 0:
+        return assigned
+
+    box_centers = (boxes[:, 0] + boxes[:, 2]) / 2
+    distances = np.linalg.norm(box_centers[:, None, :] - centers[None, :, :], axis=2)
+    used = np.zeros(len(boxes), dtype=bool)
+    for flat in np.argsort(distances, axis=None):
+        box, channel = divmod(int(flat), len(centers))
+        if max_distance is not None and distances[box, channel] > max_distance:
+            break
+        if used[box] or assigned[channel] >= 0:
+            continue
+        used[box] = True
+        assigned[channel] = box
+        if (assigned >= 0).all():
+            break
+    return assigned
+
+
+def reference_sort_boxes(boxes):
+    """原始排序实现（逐点维护当前行/列均值），作为基准保留"""
+    if not boxes:
+        return []
+
+    heights = [abs(box[2][1] - box[0][1]) for box in boxes]
+    widths = [abs(box[2][0] - box[0][0]) for box in boxes]
+    median_height = sorted(heights)[len(heights)//2]
+    median_width = sorted(widths)[len(widths)//2]
+
+    row_thresh = median_height * 0.6
+    col_thresh = median_width * 0.8
+
+    centers = [(
+        (box[0][0]+box[2][0])/2,
+        (box[0][1]+box[2][1])/2,
+        i
+    ) for i, box in enumerate(boxes)]
+
+    centers_sorted = sorted(centers, key=lambda x: x[1])
+
+    rows = []
+    current_row = [centers_sorted[0]]
+    for point in centers_sorted[1:]:
+        base_y = np.mean([p[1] for p in current_row])
+        if abs(point[1] - base_y) > row_thresh:
+            rows.append(current_row)
+            current_row = [point]
+        else:
+            current_row.append(point)
+    rows.append(current_row)
+
+    sorted_boxes = []
+    for row in rows:
+        row_sorted = sorted(row, key=lambda x: x[0])
+        columns = []
+        current_col = [row_sorted[0]]
+        for point in row_sorted[1:]:
+            base_x = np.mean([p[0] for p in current_col])
+            if abs(point[0] - base_x) > col_thresh:
+                columns.append(current_col)
+                current_col = [point]
+            else:
+                current_col.append(point)
+        columns.append(current_col)
+
+        for col in columns:
+            col_sorted = sorted(col, key=lambda x: x[1])
+            sorted_boxes.extend([boxes[p[2]] for p in col_sorted])
+
+    return sorted_boxes
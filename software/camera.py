@@ -1,7 +1,9 @@
+import argparse
 import cv2
 import os
 import time
 from datetime import datetime
+from recorder import RECORD_MODES, VIDEO_CODECS, FrameRecorder
 
 def get_first_available_camera():
     for i in range(5):
@@ -22,15 +24,14 @@ def create_output_folder(base_path="captures"):
     os.makedirs(folder_path, exist_ok=True)
     return folder_path
 
-def main():
+def main(mode="frames", codec="MJPG", capture_interval=0.1, queue_size=64):
     cap = get_first_available_camera()
     base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "captures")
     os.makedirs(base_path, exist_ok=True)
 
-    is_capturing = False
-    save_folder = None
+    recorder = None
     last_capture_time = 0
-    capture_interval = 0.1  # 秒
+    last_report_time = 0
 
     print("按 's' 开始拍照，'e' 停止拍照，'q' 退出程序。")
 
@@ -39,45 +40,62 @@ def main():
         if not ret:
             print("[ERROR] 无法读取摄像头画面")
             break
+        is_capturing = recorder is not None
+
+        # 如果正在拍照，定时把原始帧交给后台编码（提示文字只画在预览副本上）
+        if is_capturing:
+            now = time.time()
+            if now - last_capture_time >= capture_interval:
+                recorder.write(frame)
+                last_capture_time = now
+            if now - last_report_time >= 1.0:
+                stats = recorder.stats()
+                print(f"已保存 {stats['written']} 帧，丢帧 {stats['dropped']}，队列 {stats['queued']}")
+                last_report_time = now
 
         # 显示提示
+        preview = frame.copy()
         status_text = "拍照中..." if is_capturing else "等待开始 (按s开始)"
-        cv2.putText(frame, status_text, (10, 30),
+        cv2.putText(preview, status_text, (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255) if is_capturing else (0, 255, 0), 2)
 
-        cv2.imshow("Camera", frame)
+        cv2.imshow("Camera", preview)
 
         key = cv2.waitKey(1) & 0xFF
 
         # 开始拍照
         if key == ord('s') and not is_capturing:
             save_folder = create_output_folder(base_path)
+            # avi 模式按前几帧的实测间隔确定帧率，这里只作为帧数不足时的默认值
+            fps = 1 / capture_interval if capture_interval > 0 else (cap.get(cv2.CAP_PROP_FPS) or 30)
+            recorder = FrameRecorder(save_folder, mode, codec, fps, queue_size)
             print(f"[START] 开始拍照，保存路径：{save_folder}")
-            is_capturing = True
-            last_capture_time = time.time()
+            last_capture_time = 0
 
         # 停止拍照
         elif key == ord('e') and is_capturing:
-            print("[END] 停止拍照")
-            is_capturing = False
+            stats = recorder.close()
+            recorder = None
+            print(f"[END] 停止拍照，保存 {stats['written']} 帧，丢帧 {stats['dropped']}，"
+                  f"写入失败 {stats['failed']}，平均编码 {stats['encode_ms']} ms，帧率 {stats['fps']}")
 
         # 退出程序
         elif key == ord('q'):
             print("[QUIT] 退出程序")
             break
 
-        # 如果正在拍照，定时保存图像
-        if is_capturing:
-            now = time.time()
-            if now - last_capture_time >= capture_interval:
-                timestamp = get_timestamp()
-                filename = os.path.join(save_folder, f"{timestamp}.jpg")
-                cv2.imwrite(filename, frame)
-                print(f"保存：{filename}")
-                last_capture_time = now
-
+    if recorder is not None:
+        stats = recorder.close()
+        print(f"[END] 保存 {stats['written']} 帧，丢帧 {stats['dropped']}，写入失败 {stats['failed']}")
     cap.release()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="摄像头采集，后台编码保存")
+    parser.add_argument("--mode", choices=RECORD_MODES, default="frames",
+                        help="逐帧 JPEG（data_ocr/回放/基准测试均可读取）或 avi 视频文件")
+    parser.add_argument("--codec", choices=VIDEO_CODECS, default="MJPG", help="avi 模式的编码，FFV1 为无损")
+    parser.add_argument("--interval", type=float, default=0.1, help="保存间隔（秒），0 为每帧保存")
+    parser.add_argument("--queue", type=int, default=64, help="编码队列长度，满时丢帧")
+    args = parser.parse_args()
+    main(args.mode, args.codec, args.interval, args.queue)
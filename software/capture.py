@@ -0,0 +1,251 @@
+import threading
+import weakref
+import time
+from collections import deque
+import cv2
+
+
+class CameraCapture():
+    """低延迟摄像头采集
+
+    后台线程持续 grab() 取出驱动缓冲中的帧并打上时间戳，只有有读取请求时才
+    retrieve() 解码；读取时总是拿到请求之后的下一帧，不会拿到缓冲里的旧帧，
+    未被读取的帧计为丢帧。
+    对外保留 VideoCapture 的 read()/isOpened()/release() 接口。
+    """
+
+    def __init__(self, index=None, width=640, height=480, fps=30, fourcc="MJPG", buffer_size=1,
+                 max_index=5):
+        self.cap = self._open(index, max_index)
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+        self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+        self.sequence = 0  # 已 grab 的帧序号
+        self.requests = 0  # 等待中的读取请求数
+        self.frame = None  # 最近一次解码的帧
+        self.frame_sequence = 0
+        self.timestamp = 0.0
+        self.grab_times = deque(maxlen=60)
+        self.delivered = 0
+        self.dropped = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self.thread.start()
+
+    def _open(self, index, max_index):
+        indices = [index] if index is not None else range(max_index)
+        for i in indices:
+            cap = cv2.VideoCapture(i)
+            if cap.isOpened():
+                return cap
+            cap.release()
+        raise RuntimeError("No available camera.")
+
+    def _grab_loop(self):
+        # grab/retrieve 只在本线程调用，避免多线程同时访问设备
+        while self.running:
+            ok = self.cap.grab()
+            now = time.monotonic()
+            if not ok:
+                time.sleep(0.01)
+                continue
+            with self.lock:
+                wanted = self.requests > 0
+            frame = None
+            if wanted:
+                ok, frame = self.cap.retrieve()
+                if not ok:
+                    frame = None  # 解码失败的帧不发布，同样计为丢帧
+            with self.lock:
+                self.sequence += 1
+                self.grab_times.append(now)
+                if frame is None:
+                    # 无人读取的帧只 grab 不解码，计为丢帧
+                    self.dropped += 1
+                    continue
+                self.frame = frame
+                self.frame_sequence = self.sequence
+                self.timestamp = now
+                self.requests = 0
+                self.new_frame.notify_all()
+
+    def read_frame(self, timeout=1.0):
+        """等待下一帧最新画面，返回 (帧, 采集时间戳)，超时返回 (None, 0.0)"""
+        with self.new_frame:
+            start = self.sequence
+            self.requests += 1
+            if not self.new_frame.wait_for(lambda: self.frame_sequence > start or not self.running, timeout):
+                # 超时撤回请求，否则下一帧会被解码却无人读取
+                self.requests = max(0, self.requests - 1)
+                return None, 0.0
+            if not self.running:
+                return None, 0.0
+            self.delivered += 1
+            return self.frame, self.timestamp
+
+    def read(self):
+        """兼容 cv2.VideoCapture.read()"""
+        frame, _ = self.read_frame()
+        return frame is not None, frame
+
+    @property
+    def fps(self):
+        """按最近的 grab 时间戳计算的实际帧率"""
+        with self.lock:
+            if len(self.grab_times) < 2:
+                return 0.0
+            span = self.grab_times[-1] - self.grab_times[0]
+            return (len(self.grab_times) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        return {"fps": self.fps, "delivered": self.delivered, "dropped": self.dropped}
+
+    def isOpened(self):
+        return self.running and self.cap.isOpened()
+
+    def release(self):
+        self.running = False
+        with self.new_frame:
+            self.new_frame.notify_all()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+        self.cap.release()
+
+
+class FrameBroker():
+    """帧分发：独占帧源，每帧只采集解码一次，发布给任意多个订阅者
+
+    发布的帧设为只读，订阅者拿到的是同一块内存（零拷贝），需要修改时自行 copy()。
+    按需发布：只有订阅者在等待新帧时才向帧源取帧，没人等待时摄像头只 grab 不解码；
+    同时等待的订阅者共用同一次解码。处理慢的订阅者跳过中间帧，不会拖慢其它订阅者。
+    lockstep 时改为等所有订阅者取走上一帧再发布下一帧，用于尽快回放录制数据。
+    """
+
+    def __init__(self, source, lockstep=None):
+        self.source = source
+        self.lockstep = getattr(source, 'lockstep', False) if lockstep is None else lockstep
+        self.subscribers = weakref.WeakSet()
+        self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+        self.frame = None
+        self.timestamp = 0.0
+        self.sequence = 0
+        self.requests = 0  # 等待新帧的订阅者数
+        self.running = True
+        self.thread = threading.Thread(target=self._publish_loop, daemon=True)
+        self.thread.start()
+
+    def _publish_loop(self):
+        while self.running:
+            if not self.lockstep:
+                with self.new_frame:
+                    # 超时醒来只为检查帧源是否已关闭
+                    if not self.new_frame.wait_for(lambda: self.requests > 0 or not self.running, 0.5):
+                        if not self.source.isOpened():
+                            break
+                        continue
+                if not self.running:
+                    break
+            frame, timestamp = self.source.read_frame()
+            if frame is None:
+                if not self.source.isOpened():
+                    break
+                continue
+            frame.flags.writeable = False
+            with self.new_frame:
+                if self.lockstep:
+                    # 至少有一个订阅者且都已取走上一帧才发布，开头的帧不会被跳过
+                    self.new_frame.wait_for(lambda: not self.running or len(self.subscribers) > 0 and all(
+                        subscriber.sequence >= self.sequence for subscriber in self.subscribers))
+                self.frame = frame
+                self.timestamp = timestamp
+                self.sequence += 1
+                self.new_frame.notify_all()
+        with self.new_frame:
+            self.running = False
+            self.new_frame.notify_all()
+
+    def wait(self, after, timeout):
+        """等待序号大于 after 的帧，返回 (帧, 时间戳, 序号)，超时帧为 None"""
+        with self.new_frame:
+            if self.sequence <= after:
+                self.requests += 1
+                self.new_frame.notify_all()
+                try:
+                    self.new_frame.wait_for(lambda: self.sequence > after or not self.running, timeout)
+                finally:
+                    self.requests -= 1
+            if self.sequence <= after:
+                return None, 0.0, after
+            return self.frame, self.timestamp, self.sequence
+
+    def latest(self, timeout=1.0):
+        """立即返回最近发布的帧 (帧, 时间戳)，尚无帧时最多等待 timeout"""
+        frame, timestamp, _ = self.wait(0, timeout)
+        return frame, timestamp
+
+    def subscribe(self):
+        subscription = FrameSubscription(self)
+        with self.new_frame:
+            self.subscribers.add(subscription)
+            self.new_frame.notify_all()
+        return subscription
+
+    def consumed(self):
+        """订阅者取走一帧后调用，lockstep 时唤醒发布线程"""
+        if self.lockstep:
+            with self.new_frame:
+                self.new_frame.notify_all()
+
+    def stats(self):
+        stats = self.source.stats() if hasattr(self.source, 'stats') else {}
+        stats["published"] = self.sequence
+        return stats
+
+    def isOpened(self):
+        return self.running and self.source.isOpened()
+
+    def release(self):
+        self.running = False
+        with self.new_frame:
+            self.new_frame.notify_all()
+        self.source.release()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+
+
+class FrameSubscription():
+    """FrameBroker 的一个订阅者，read() 返回上次读取之后发布的最新帧"""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.sequence = broker.sequence
+        self.skipped = 0  # 因来不及处理而跳过的帧数
+
+    def read_frame(self, timeout=1.0):
+        frame, timestamp, sequence = self.broker.wait(self.sequence, timeout)
+        if frame is not None:
+            self.skipped += sequence - self.sequence - 1
+            self.sequence = sequence
+            self.broker.consumed()
+        return frame, timestamp
+
+    def read(self):
+        """兼容 cv2.VideoCapture.read()"""
+        frame, _ = self.read_frame()
+        return frame is not None, frame
+
+    def stats(self):
+        stats = self.broker.stats()
+        stats["skipped"] = self.skipped
+        return stats
+
+    def isOpened(self):
+        return self.broker.isOpened()
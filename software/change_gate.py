@@ -0,0 +1,77 @@
+import cv2
+
+
+class ChannelChangeGate():
+    """按通道比较二值裁剪图的缩略签名，显示未变化时复用上次读数"""
+
+    def __init__(self, change_threshold=64, max_reuse=20, size=(32, 12)):
+        self.change_threshold = change_threshold  # 缩略图单格最大灰度差
+        self.max_reuse = max_reuse  # 同一读数最多连续复用的帧数
+        self.size = size
+        self.skipped = 0
+        self.processed = 0
+        self.reset()
+
+    def reset(self):
+        """丢弃已跟踪的通道框，下一帧重新检测"""
+        self.boxes = None
+        self.signatures = []
+        self.readings = []
+        self.ages = []
+
+    def signature(self, crop):
+        """二值裁剪图缩放为固定尺寸的灰度缩略图"""
+        return cv2.resize(crop, self.size, interpolation=cv2.INTER_AREA)
+
+    def drop(self, channel):
+        """只丢弃一个通道的框，其它通道继续跟踪；全部丢失时等同 reset()
+
+        换成新的列表，同一批次中此前规划的帧不再回写参考。
+        """
+        self.boxes = list(self.boxes)
+        self.boxes[channel] = None
+        self.signatures[channel] = None
+        self.readings[channel] = None
+        if all(box is None for box in self.boxes):
+            self.reset()
+
+    def relocate(self, channel, box, signature, reading):
+        """重新定位到的通道框及其识别结果作为新的参考"""
+        self.boxes[channel] = box
+        self.update(channel, signature, reading)
+
+    def track(self, boxes, signatures, readings):
+        """以一帧完整识别结果作为各通道的参考"""
+        self.boxes = list(boxes)
+        self.signatures = list(signatures)
+        self.readings = list(readings)
+        self.ages = [0] * len(self.boxes)
+
+    def lookup(self, channel, signature):
+        """通道未变化且未超过复用次数时返回上次读数，否则返回 None"""
+        if (self.ages[channel] < self.max_reuse and
+                cv2.norm(signature, self.signatures[channel], cv2.NORM_INF) < self.change_threshold):
+            self.ages[channel] += 1
+            self.skipped += 1
+            return self.readings[channel]
+        self.processed += 1
+        return None
+
+    def update(self, channel, signature, reading):
+        """通道重新识别后刷新参考"""
+        self.signatures[channel] = signature
+        self.readings[channel] = reading
+        self.ages[channel] = 0
+
+    def count_processed(self, count):
+        """记录未经门控直接识别的通道数"""
+        self.processed += count
+
+    def stats(self):
+        """跳过与识别的通道计数"""
+        total = self.skipped + self.processed
+        return {
+            "skipped": self.skipped,
+            "processed": self.processed,
+            "skip_ratio": self.skipped / total if total else 0.0,
+        }
@@ -0,0 +1,85 @@
+import numpy as np
+from box_order import assign_channels, box_array
+
+
+class ChannelTracker():
+    """把每帧的检测框按位置关联到固定的通道编号
+
+    第一次出现至少 channel_num 个读数框时按读数顺序锁定各通道位置；框多于通道数
+    （面板上另有标签、单位或反光被识别为数字）时取置信度最高的 channel_num 个，
+    没有置信度时取框高最接近中位数的。之后每帧按预测中心（匀速模型）做最近中心匹配，
+    缺失的通道只在本帧缺席，不会连累其它通道。所有通道长期丢失时解除锁定，重新建立。
+    """
+
+    def __init__(self, channel_num, max_distance=1.0, smoothing=0.5, max_missed=50):
+        self.channel_num = channel_num
+        self.max_distance = max_distance  # 最大匹配距离，相对通道框高
+        self.smoothing = smoothing  # 位置与速度更新的平滑系数
+        self.max_missed = max_missed  # 所有通道连续丢失超过该帧数后解除锁定
+        self.reset()
+
+    def reset(self):
+        self.centers = None
+        self.velocities = None
+        self.heights = None
+        self.missed = None
+
+    @property
+    def locked(self):
+        return self.centers is not None
+
+    def lock(self, boxes):
+        """以按通道顺序排列的框建立各通道"""
+        boxes = box_array(boxes)
+        self.centers = (boxes[:, 0] + boxes[:, 2]) / 2
+        self.velocities = np.zeros_like(self.centers)
+        self.heights = np.abs(boxes[:, 2, 1] - boxes[:, 0, 1])
+        self.missed = np.zeros(len(boxes), dtype=np.intp)
+
+    def locate(self, boxes, channels):
+        """按预测中心为指定通道找最近的框，返回 {通道: 框下标}，不更新跟踪状态"""
+        if not self.locked or len(boxes) == 0:
+            return {}
+        predicted = (self.centers + self.velocities)[channels]
+        limit = self.max_distance * float(np.median(self.heights))
+        assigned = assign_channels(boxes, predicted, max_distance=limit)
+        return {channel: int(k) for channel, k in zip(channels, assigned) if k >= 0}
+
+    def select(self, boxes, scores=None):
+        """从多于通道数的框中选出用于锁定的 channel_num 个，返回按原顺序排列的下标"""
+        if scores is not None:
+            rank = np.argsort(-np.asarray(scores, dtype=np.float32), kind="stable")
+        else:
+            boxes = box_array(boxes)
+            heights = np.abs(boxes[:, 2, 1] - boxes[:, 0, 1])
+            rank = np.argsort(np.abs(heights - np.median(heights)), kind="stable")
+        return np.sort(rank[:self.channel_num])
+
+    def assign(self, boxes, scores=None):
+        """返回每个通道对应的框下标（缺失为 -1）；boxes 需已按读数顺序排列，scores 为对应置信度"""
+        if not self.locked:
+            if len(boxes) < self.channel_num:
+                return np.full(self.channel_num, -1, dtype=np.intp)
+            chosen = self.select(boxes, scores) if len(boxes) > self.channel_num else np.arange(self.channel_num)
+            self.lock(box_array(boxes)[chosen])
+            return chosen.astype(np.intp)
+
+        predicted = self.centers + self.velocities
+        limit = self.max_distance * float(np.median(self.heights))
+        assigned = assign_channels(boxes, predicted, max_distance=limit)
+        matched = assigned >= 0
+        if matched.any():
+            boxes = box_array(boxes)[assigned[matched]]
+            centers = (boxes[:, 0] + boxes[:, 2]) / 2
+            moved = centers - self.centers[matched]
+            self.velocities[matched] = self.smoothing * moved + (1 - self.smoothing) * self.velocities[matched]
+            self.centers[matched] += self.smoothing * moved
+            self.heights[matched] = np.abs(boxes[:, 2, 1] - boxes[:, 0, 1])
+        self.missed[matched] = 0
+        self.missed[~matched] += 1
+        # 丢失的通道沿预测位置滑行，速度逐帧衰减
+        self.centers[~matched] += self.velocities[~matched]
+        self.velocities[~matched] *= 0.5
+        if (self.missed > self.max_missed).all():
+            self.reset()
+        return assigned
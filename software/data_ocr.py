@@ -1,17 +1,28 @@
+import argparse
+import csv
+import json
+import multiprocessing
 import os
+import re
 import time
-from paddleocr import PaddleOCR, draw_ocr
-from PIL import Image, ImageDraw, ImageFont
+from datetime import datetime
 
 
-# 初始化OCR
-ocr = PaddleOCR(use_angle_cls=True, lang='en')
-
 # 路径配置
 input_root = 'captures'
 output_root = 'result'
 font_path = 'simfang.ttf'  # 确保字体文件存在
 
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+MANIFEST_FILE = 'manifest.txt'
+COLUMNS = ["path", "timestamp", "boxes", "texts", "scores", "latency_ms"]
+# camera.py 的文件名时间戳，可带毫秒或微秒后缀
+TIMESTAMP_PATTERN = re.compile(r'(\d{8}_\d{6})(?:[_.](\d{6}|\d{3})(?!\d))?')
+
+# 每个工作进程各自持有一个 PaddleOCR
+_ocr = None
+
+
 def get_text_size(draw, text, font):
     """兼容不同Pillow版本的文本尺寸获取"""
     try:
@@ -22,68 +33,275 @@ def get_text_size(draw, text, font):
         # 旧版本回退到textsize
         return draw.textsize(text, font=font)
 
-def process_images_recursive():
-    for root, dirs, files in os.walk(input_root):
+
+def find_images(root):
+    """递归列出图片的相对路径（排序后返回，保证每次运行顺序一致）"""
+    paths = []
+    for current, _, files in os.walk(root):
         for file in files:
-            if not file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')):
-                continue
+            if file.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.relpath(os.path.join(current, file), root))
+            elif file.lower().endswith('.avi'):
+                print(f"跳过视频 {os.path.relpath(os.path.join(current, file), root)}：批量识别只处理图片，"
+                      f"请用 camera.py --mode frames 采集或用 ReplaySource 回放")
+    return sorted(paths)
 
-            input_path = os.path.join(root, file)
-            relative_path = os.path.relpath(root, input_root)
-            output_dir = os.path.join(output_root, relative_path)
-            output_path = os.path.join(output_dir, f"result_{file}")
 
-            os.makedirs(output_dir, exist_ok=True)
-            start_time = time.time()
+def image_timestamp(path, full_path):
+    """优先取文件名中的时间戳，否则取文件修改时间"""
+    match = TIMESTAMP_PATTERN.search(os.path.basename(path))
+    if match:
+        stamp = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+        if match.group(2):
+            stamp = stamp.replace(microsecond=int(match.group(2).ljust(6, '0')))
+        return stamp.isoformat()
+    return datetime.fromtimestamp(os.path.getmtime(full_path)).isoformat()
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    done = set()
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            done = {line.rstrip('\n') for line in f if line.strip()}
+    # 分片已完整写出但进程在登记清单前被终止时，按可读的分片补齐清单，避免重复识别
+    missing = [p for p in _parquet_paths(output_dir) if p not in done]
+    if missing:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.writelines(p + "\n" for p in missing)
+        done.update(missing)
+    return done
 
-            try:
-                # OCR处理
-                result = ocr.ocr(input_path, cls=False)
-                image = Image.open(input_path).convert('RGB')
-                
-                # 绘制OCR结果
-                if result and result[0]:
-                    image = draw_ocr(
-                        image,
-                        [line[0] for line in result[0]],
-                        [line[1][0] for line in result[0]],
-                        [line[1][1] for line in result[0]],
-                        font_path=font_path
-                    )
-                    image = Image.fromarray(image)
-                
-                draw = ImageDraw.Draw(image)
-                processing_time = (time.time() - start_time) * 1000
-
-                # 添加时间戳
-                font = ImageFont.truetype(font_path, 30)
-                time_text = f"{processing_time:.1f}ms"
-                
-                # 使用兼容方法获取文本尺寸
-                text_width, text_height = get_text_size(draw, time_text, font)
-                
-                margin = 10
-                position = (margin, image.height - text_height - margin)
-
-                # 绘制背景框
-                draw.rectangle(
-                    [position[0]-5, position[1]-5,
-                     position[0]+text_width+5, position[1]+text_height+5],
-                    fill=(0,0,0)
-                )
-                draw.text(position, time_text, font=font, fill=(255,255,255))
-
-                # 保存结果
-                image.save(output_path)
-                print(f"Success: {input_path} -> {output_path}")
 
+def _parquet_paths(output_dir):
+    """已完成的 Parquet 分片中的图片路径；清理中断时遗留的临时文件"""
+    parts = os.path.join(output_dir, "results")
+    if not os.path.isdir(parts):
+        return []
+    paths = []
+    for name in sorted(os.listdir(parts)):
+        file = os.path.join(parts, name)
+        if name.endswith(".tmp"):
+            os.remove(file)
+        elif name.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            try:
+                paths.extend(pq.read_table(file, columns=["path"]).column("path").to_pylist())
             except Exception as e:
-                print(f"Error processing {input_path}: {str(e)}")
-                # 保存原始图片用于调试
-                image.save(os.path.join(output_dir, f"error_{file}"))
+                print(f"无法读取结果分片 {name}: {e}")
+    return paths
+
+
+def _init_worker(cpu_threads):
+    global _ocr
+    from paddleocr import PaddleOCR
+    _ocr = PaddleOCR(use_angle_cls=False, lang='en', cpu_threads=cpu_threads, show_log=False)
+
+
+def _ocr_image(task):
+    """工作进程中识别一张图片，返回一行结果"""
+    import cv2
+    path, full_path = task
+    row = {"path": path, "timestamp": image_timestamp(path, full_path),
+           "boxes": "[]", "texts": "[]", "scores": "[]", "latency_ms": None}
+    image = cv2.imread(full_path)
+    if image is None:
+        return row, "无法读取图片"
+    start = time.perf_counter()
+    try:
+        result = _ocr.ocr(image, cls=False)
+    except Exception as e:
+        return row, str(e)
+    row["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    lines = result[0] if result and result[0] else []
+    row["boxes"] = json.dumps([[[round(float(v), 1) for v in point] for point in line[0]] for line in lines])
+    row["texts"] = json.dumps([line[1][0] for line in lines], ensure_ascii=False)
+    row["scores"] = json.dumps([round(float(line[1][1]), 4) for line in lines])
+    return row, None
+
+
+class ResultWriter():
+    """流式写出识别结果：CSV 逐行追加；Parquet 每 row_group 行写出一个完整的分片文件
+
+    Parquet 的尾部元数据在文件关闭时才写入，因此每个分片先写临时文件、关闭后改名，
+    之后才登记清单，进程被终止时最多丢失未写出的一个行组。
+    """
+
+    def __init__(self, output_dir, format="csv", row_group=500):
+        self.format = format
+        self.row_group = row_group
+        self.rows = []
+        self.manifest = open(os.path.join(output_dir, MANIFEST_FILE), 'a', encoding='utf-8')
+        if format == "csv":
+            path = os.path.join(output_dir, "results.csv")
+            exists = os.path.exists(path)
+            self.file = open(path, 'a', newline='', encoding='utf-8')
+            self.csv = csv.DictWriter(self.file, fieldnames=COLUMNS)
+            if not exists:
+                self.csv.writeheader()
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self.pa = pa
+            self.pq = pq
+            self.schema = pa.schema([("path", pa.string()), ("timestamp", pa.string()), ("boxes", pa.string()),
+                                     ("texts", pa.string()), ("scores", pa.string()), ("latency_ms", pa.float64())])
+            self.parts = os.path.join(output_dir, "results")
+            os.makedirs(self.parts, exist_ok=True)
+            self.run = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            self.part_count = 0
+
+    def write(self, row):
+        if self.format == "csv":
+            self.csv.writerow(row)
+            self.file.flush()
+            self._mark(row["path"])
+            return
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group:
+            self._flush_parquet()
+
+    def _mark(self, path):
+        # 结果落盘后才记入清单，中断后重跑不会漏掉图片
+        self.manifest.write(path + "\n")
+        self.manifest.flush()
+
+    def _flush_parquet(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows, schema=self.schema)
+        path = os.path.join(self.parts, f"part-{self.run}-{self.part_count:05d}.parquet")
+        self.pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.part_count += 1
+        for row in self.rows:
+            self._mark(row["path"])
+        self.rows = []
+
+    def close(self):
+        if self.format == "csv":
+            self.file.close()
+        else:
+            self._flush_parquet()
+        self.manifest.close()
+
+
+def process_images_recursive(input_dir=input_root, output_dir=output_root, workers=None, format="csv",
+                             cpu_threads=None):
+    """多进程识别 input_dir 下的全部图片，跳过清单中已处理的文件，返回本次处理的张数"""
+    os.makedirs(output_dir, exist_ok=True)
+    done = load_manifest(output_dir)
+    pending = [path for path in find_images(input_dir) if path not in done]
+    print(f"共 {len(pending) + len(done)} 张图片，已处理 {len(done)}，待处理 {len(pending)}")
+    if not pending:
+        return 0
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    # 每个进程的推理线程数，避免进程数 x 线程数超过核数
+    cpu_threads = cpu_threads or max(1, (os.cpu_count() or 1) // workers)
+    tasks = [(path, os.path.join(input_dir, path)) for path in pending]
+    writer = ResultWriter(output_dir, format)
+    start = time.time()
+    errors = 0
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(cpu_threads,)) as pool:
+            for count, (row, error) in enumerate(pool.imap_unordered(_ocr_image, tasks, chunksize=4), 1):
+                if error:
+                    errors += 1
+                    print(f"Error processing {row['path']}: {error}")
+                    continue
+                writer.write(row)
+                if count % 100 == 0 or count == len(tasks):
+                    elapsed = time.time() - start
+                    print(f"{count}/{len(tasks)}，{count / elapsed:.1f} 张/秒")
+    finally:
+        writer.close()
+    print(f"完成 {len(tasks) - errors} 张，失败 {errors}，耗时 {time.time() - start:.0f} 秒")
+    return len(tasks) - errors
+
+
+def read_results(output_dir):
+    """读取全部识别结果行（CSV 与 Parquet 分片）"""
+    rows = []
+    path = os.path.join(output_dir, "results.csv")
+    if os.path.exists(path):
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            rows.extend(csv.DictReader(f))
+    parts = os.path.join(output_dir, "results")
+    if os.path.isdir(parts):
+        import pyarrow.parquet as pq
+        for name in sorted(os.listdir(parts)):
+            if name.endswith(".parquet"):
+                rows.extend(pq.read_table(os.path.join(parts, name)).to_pylist())
+    return rows
+
+
+def _render_worker_init():
+    # 标注图只是辅助查看，降低优先级，不与识别争抢 CPU
+    if hasattr(os, 'nice'):
+        os.nice(10)
+
+
+def _render_image(task):
+    """按识别结果绘制标注图和耗时"""
+    from paddleocr import draw_ocr
+    from PIL import Image, ImageDraw, ImageFont
+    row, input_path, output_path = task
+    try:
+        image = Image.open(input_path).convert('RGB')
+        boxes, texts, scores = json.loads(row["boxes"]), json.loads(row["texts"]), json.loads(row["scores"])
+        if boxes:
+            image = Image.fromarray(draw_ocr(image, boxes, texts, scores, font_path=font_path))
+
+        draw = ImageDraw.Draw(image)
+        font = ImageFont.truetype(font_path, 30)
+        time_text = f"{float(row['latency_ms']):.1f}ms"
+        text_width, text_height = get_text_size(draw, time_text, font)
+        margin = 10
+        position = (margin, image.height - text_height - margin)
+        draw.rectangle(
+            [position[0]-5, position[1]-5,
+             position[0]+text_width+5, position[1]+text_height+5],
+            fill=(0,0,0)
+        )
+        draw.text(position, time_text, font=font, fill=(255,255,255))
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        image.save(output_path)
+        return None
+    except Exception as e:
+        return f"Error rendering {input_path}: {str(e)}"
+
+
+def render_annotations(input_dir=input_root, output_dir=output_root, workers=1):
+    """第二阶段：按结果表绘制标注图，已存在的标注图跳过"""
+    tasks = []
+    for row in read_results(output_dir):
+        folder, file = os.path.split(row["path"])
+        output_path = os.path.join(output_dir, folder, f"result_{file}")
+        if not os.path.exists(output_path):
+            tasks.append((row, os.path.join(input_dir, row["path"]), output_path))
+    print(f"待绘制标注图 {len(tasks)} 张")
+    with multiprocessing.Pool(workers, initializer=_render_worker_init) as pool:
+        for error in pool.imap_unordered(_render_image, tasks, chunksize=8):
+            if error:
+                print(error)
+
 
 if __name__ == "__main__":
-    os.makedirs(output_root, exist_ok=True)
+    parser = argparse.ArgumentParser(description="批量识别采集图片，可中断后续跑")
+    parser.add_argument("--input", default=input_root)
+    parser.add_argument("--output", default=output_root)
+    parser.add_argument("--workers", type=int, help="识别进程数，默认为核数减一")
+    parser.add_argument("--threads", type=int, help="每个进程的推理线程数")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--annotate", action="store_true", help="识别完成后绘制标注图")
+    parser.add_argument("--annotate-only", action="store_true", help="只按已有结果绘制标注图")
+    parser.add_argument("--annotate-workers", type=int, default=1)
+    args = parser.parse_args()
+
     print("Starting processing...")
-    process_images_recursive()
-    print("Processing completed. Check results in", output_root)
\ No newline at end of file
+    if not args.annotate_only:
+        process_images_recursive(args.input, args.output, args.workers, args.format, args.threads)
+    if args.annotate or args.annotate_only:
+        render_annotations(args.input, args.output, args.annotate_workers)
+    print("Processing completed. Check results in", args.output)
@@ -0,0 +1,99 @@
+import cv2
+import numpy as np
+
+
+def rect_to_box(x0, y0, x1, y1):
+    """轴对齐矩形转为 sort_boxes 使用的四点框（左上、右上、右下、左下）"""
+    return np.float32([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+
+
+def box_iou(box_a, box_b):
+    """两个四点框外接矩形的交并比"""
+    ax0, ay0 = np.min(box_a, axis=0)
+    ax1, ay1 = np.max(box_a, axis=0)
+    bx0, by0 = np.min(box_b, axis=0)
+    bx1, by1 = np.max(box_b, axis=0)
+    inter = max(0.0, min(ax1, bx1) - max(ax0, bx0)) * max(0.0, min(ay1, by1) - max(ay0, by0))
+    union = (ax1 - ax0) * (ay1 - ay0) + (bx1 - bx0) * (by1 - by0) - inter
+    return float(inter / union) if union > 0 else 0.0
+
+
+class NeuralDetector():
+    """PaddleOCR DB 文本检测"""
+
+    name = "neural"
+
+    def __init__(self, ocr):
+        self.ocr = ocr
+
+    def __call__(self, binary):
+        result = self.ocr.ocr(binary, rec=False, cls=False)
+        if not result or not result[0]:
+            return []
+        return [np.asarray(box, dtype=np.float32) for box in result[0]]
+
+
+class ComponentDetector():
+    """基于连通域的读数定位，适用于暗背景上的红色数码管
+
+    先用小核闭运算把同一数字的笔段连起来，按面积和高度去掉噪点并估计字高，
+    再按字高膨胀把同一读数的数字合并成一组，每组输出一个框。
+    """
+
+    name = "component"
+
+    def __init__(self, join=3, min_area=8, min_height=4, merge_x=0.8, merge_y=0.3, pad=0.1, min_aspect=0.8):
+        self.join = join  # 连接笔段的闭运算核尺寸（像素）
+        self.min_area = min_area
+        self.min_height = min_height
+        self.merge_x = merge_x  # 水平合并距离，相对字高
+        self.merge_y = merge_y  # 垂直合并距离，相对字高
+        self.pad = pad  # 输出框外扩比例，相对框高
+        self.min_aspect = min_aspect  # 读数框最小宽高比
+
+    def __call__(self, binary):
+        joined = cv2.morphologyEx(binary, cv2.MORPH_CLOSE,
+                                  cv2.getStructuringElement(cv2.MORPH_RECT, (self.join, self.join)))
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        keep = (areas >= self.min_area) & (heights >= self.min_height)
+        if not keep.any():
+            return []
+
+        # 小数点和残留噪点比数字矮得多，只用较高的连通域估计字高
+        kept_heights = heights[keep]
+        digit_height = float(np.median(kept_heights[kept_heights >= 0.5 * kept_heights.max()]))
+        if keep.all():
+            mask = joined
+        else:
+            lookup = np.zeros(count, dtype=np.uint8)
+            lookup[1:][keep] = 255
+            mask = lookup[labels]
+
+        gap_x = max(1, int(digit_height * self.merge_x))
+        gap_y = max(1, int(digit_height * self.merge_y))
+        merged = cv2.dilate(mask, cv2.getStructuringElement(cv2.MORPH_RECT, (gap_x, gap_y)))
+        _, _, stats, _ = cv2.connectedComponentsWithStats(merged, connectivity=8)
+
+        height_limit, width_limit = binary.shape
+        boxes = []
+        for x, y, width, height, _ in stats[1:]:
+            # 膨胀后的框向内收回核的一半
+            x0, y0 = x + gap_x // 2, y + gap_y // 2
+            x1, y1 = x + width - (gap_x - gap_x // 2), y + height - (gap_y - gap_y // 2)
+            if y1 - y0 < 0.6 * digit_height or (x1 - x0) < self.min_aspect * (y1 - y0):
+                continue
+            pad = int((y1 - y0) * self.pad)
+            boxes.append(rect_to_box(max(0, x0 - pad), max(0, y0 - pad),
+                                     min(width_limit, x1 + pad), min(height_limit, y1 + pad)))
+        return boxes
+
+
+def make_detector(kind, ocr=None):
+    """按名称创建检测器：neural 需要 PaddleOCR 实例，component 不需要"""
+    if kind == NeuralDetector.name:
+        return NeuralDetector(ocr)
+    if kind == ComponentDetector.name:
+        return ComponentDetector()
+    raise ValueError(f"未知的检测器: {kind}")
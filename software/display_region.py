@@ -0,0 +1,63 @@
+import numpy as np
+from box_order import box_array
+
+
+class DisplayRegion():
+    """缓存各数码管读数区域的并集，只在该区域内做预处理和检测
+
+    整帧检测到全部通道后以读数框的并集外扩 margin 作为显示区域；每隔 revalidate 帧
+    或区域内检测失败时作废，回到整帧处理重新定位，以适应工装或摄像头的移动。
+    """
+
+    def __init__(self, margin=0.3, revalidate=300, detect_width=480):
+        self.margin = margin  # 外扩比例，相对读数框高度
+        self.revalidate = revalidate
+        self.detect_width = detect_width  # 检测输入的最大宽度，超过时缩小后检测
+        self.rect = None  # (x, y, w, h)
+        self.shape = None  # 最近一帧的 (高, 宽)
+        self.frames = 0
+        self.located = 0
+        self.invalidated = 0
+
+    @property
+    def expired(self):
+        return self.rect is None or self.frames >= self.revalidate
+
+    def next_frame(self, shape):
+        """返回本帧使用的区域；需要重新定位时返回 None 表示整帧处理"""
+        self.frames += 1
+        self.shape = shape[:2]
+        if self.expired:
+            return None
+        x, y, w, h = self.rect
+        if x + w > shape[1] or y + h > shape[0]:
+            self.invalidate()
+            return None
+        return self.rect
+
+    def update(self, boxes):
+        """用整帧检测到的全部读数框重新确定显示区域"""
+        shape = self.shape
+        boxes = box_array(boxes)
+        if len(boxes) == 0:
+            return
+        x0, y0 = boxes.reshape(-1, 2).min(axis=0)
+        x1, y1 = boxes.reshape(-1, 2).max(axis=0)
+        pad = self.margin * float(np.median(np.abs(boxes[:, 2, 1] - boxes[:, 0, 1])))
+        x0, y0 = max(0, int(x0 - pad)), max(0, int(y0 - pad))
+        x1, y1 = min(shape[1], int(np.ceil(x1 + pad))), min(shape[0], int(np.ceil(y1 + pad)))
+        self.rect = (x0, y0, x1 - x0, y1 - y0)
+        self.frames = 0
+        self.located += 1
+
+    def invalidate(self):
+        if self.rect is not None:
+            self.invalidated += 1
+        self.rect = None
+
+    def detect_scale(self, width):
+        """检测输入的缩放比例（不放大）"""
+        return min(1.0, self.detect_width / width) if self.detect_width else 1.0
+
+    def stats(self):
+        return {"rect": self.rect, "located": self.located, "invalidated": self.invalidated}
@@ -0,0 +1,100 @@
+import csv
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import cv2
+
+
+class EvidenceBuffer():
+    """异常取证用的内存环形缓冲
+
+    作为 FrameBroker 的一个订阅者在后台线程按 fps 节拍取帧并压缩为 JPEG。两次取帧之间
+    休眠，醒来时若识别线程已取得新帧则直接共用，否则才请求解码一帧，采集端不会因此逐帧
+    解码。只在内存中保留最近 seconds 秒、总大小不超过 max_bytes 的帧，不占用识别线程，
+    也不持续写盘。
+    触发（通道失败、置信度下降、读数跳变、人工停止等）时 dump() 把缓冲中的帧写入
+    会话目录；同一原因在 cooldown 秒内只保存一次。
+    """
+
+    def __init__(self, broker, seconds=10, fps=5, max_bytes=16 * 1024 * 1024, jpeg_quality=80,
+                 cooldown=10):
+        self.seconds = seconds
+        self.interval = 1.0 / fps if fps else 0.0
+        self.max_bytes = max_bytes
+        self.jpeg_quality = jpeg_quality
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.frames = deque()  # (采集时间戳, 系统时间, JPEG 字节)
+        self.size = 0
+        self.last_dump = {}  # 原因 -> 上次保存时间
+        self.dumps = 0
+        self.subscription = broker.subscribe()
+        self.running = True
+        self.thread = threading.Thread(target=self._buffer_loop, daemon=True)
+        self.thread.start()
+
+    def _buffer_loop(self):
+        while self.running:
+            started = time.monotonic()
+            frame, timestamp = self.subscription.read_frame()
+            if frame is None:
+                if not self.subscription.isOpened():
+                    break
+                continue
+            self._store(frame, timestamp)
+            # 按 fps 节拍取帧，间隔内不发请求
+            delay = self.interval - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+    def _store(self, frame, timestamp):
+        ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        with self.lock:
+            self.frames.append((timestamp, datetime.now(), data.tobytes()))
+            self.size += len(self.frames[-1][2])
+            while self.frames and (self.size > self.max_bytes or
+                                   timestamp - self.frames[0][0] > self.seconds):
+                self.size -= len(self.frames.popleft()[2])
+
+    def dump(self, folder, reason):
+        """把当前缓冲写入 folder 下的子目录，返回目录路径；冷却中或缓冲为空时返回 None"""
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_dump.get(reason, -self.cooldown) < self.cooldown or not self.frames:
+                return None
+            self.last_dump[reason] = now
+            frames = list(self.frames)
+            self.dumps += 1
+        path = os.path.join(folder, f"evidence_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]}_{reason}")
+        # 已压缩的帧直接写文件，放到后台线程，不阻塞调用方
+        threading.Thread(target=self._write, args=(path, reason, frames), daemon=True).start()
+        return path
+
+    def _write(self, path, reason, frames):
+        try:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "index.csv"), 'w', newline='', encoding='utf-8') as f:
+                index = csv.writer(f)
+                index.writerow(["file", "timestamp", "monotonic", "reason"])
+                for timestamp, wall_time, data in frames:
+                    file = f"{wall_time.strftime('%Y%m%d_%H%M%S_%f')}.jpg"
+                    with open(os.path.join(path, file), 'wb') as image:
+                        image.write(data)
+                    index.writerow([file, wall_time.isoformat(), f"{timestamp:.6f}", reason])
+        except Exception as e:
+            print(f"无法保存取证帧: {str(e)}")
+
+    def stats(self):
+        with self.lock:
+            span = self.frames[-1][0] - self.frames[0][0] if self.frames else 0.0
+            return {"frames": len(self.frames), "seconds": round(span, 1), "bytes": self.size,
+                    "dumps": self.dumps}
+
+    def close(self):
+        self.running = False
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
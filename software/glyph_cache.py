@@ -0,0 +1,75 @@
+from collections import OrderedDict
+import cv2
+import numpy as np
+from seven_segment import _runs
+
+
+class GlyphCache():
+    """按字形缓存识别结果的 LRU 表
+
+    数码管只会显示十几种字形。把二值裁剪图按列切成单个字形，每个字形缩放到
+    grid 大小后二值化打包作为键（另带宽高比档位），识别一次后即可按字形直接查出字符。
+    整个读数的字形全部命中时不必调用识别模型；识别结果的字符数与字形数一致且
+    置信度足够时逐字形写入，超出 max_size 时淘汰最久未用的条目。
+    """
+
+    def __init__(self, max_size=256, grid=(8, 12), min_confidence=0.8):
+        self.max_size = max_size
+        self.grid = grid  # (宽, 高)
+        self.min_confidence = min_confidence  # 低于此置信度的识别结果不写入
+        self.entries = OrderedDict()  # 键 -> (字符, 置信度)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def split(self, crop):
+        """返回裁剪图中各字形的键，无法分割时返回 None"""
+        binary = crop > 0
+        bands = _runs(binary.any(axis=1), max_gap=2)
+        if not bands:
+            return None
+        top, bottom = max(bands, key=lambda band: band[1] - band[0])
+        height = bottom - top
+        if height < 7:
+            return None
+        rows = crop[top:bottom]
+        columns = _runs(binary[top:bottom].any(axis=0), max_gap=max(1, int(height * 0.06)))
+        keys = []
+        for start, stop in columns:
+            glyph = cv2.resize(rows[:, start:stop], self.grid, interpolation=cv2.INTER_AREA)
+            aspect = min(15, int(4 * (stop - start) / height))
+            keys.append(bytes([aspect]) + np.packbits(glyph > 127).tobytes())
+        return keys
+
+    def lookup(self, keys):
+        """全部字形命中时返回 (文本, 最低置信度)，否则返回 None"""
+        if not keys:
+            return None
+        entries = []
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entries.append(entry)
+        for key in keys:
+            self.entries.move_to_end(key)
+        self.hits += 1
+        return "".join(char for char, _ in entries), min(conf for _, conf in entries)
+
+    def store(self, keys, text, score):
+        """按顺序把识别出的字符写入对应字形"""
+        if not keys or len(keys) != len(text) or score < self.min_confidence:
+            return False
+        for key, char in zip(keys, text):
+            self.entries[key] = (char, score)
+            self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_ratio": round(self.hits / total, 3) if total else 0.0}
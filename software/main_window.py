@@ -16,7 +16,6 @@ from ocr_capture_worker import CurrentMeterReader
 from datetime import datetime
 import os
 import cv2
-import time
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -25,7 +24,9 @@ class MainWindow(QMainWindow):
         self.setGeometry(100, 100, 1200, 800)
         self.channel_num = 4  # 通道数
         try:
-            self.ocr_worker = CurrentMeterReader()
+            # 检测界面开启异常取证，停止和通道失败时保存之前几秒的画面
+            self.ocr_worker = CurrentMeterReader(channel_num=self.channel_num, evidence=True)
+            self.ocr_worker.warm_up()
         except Exception as e:
             QMessageBox.critical(self, "初始化错误", f"无法初始化OCR工作线程: {str(e)}")
             self.close()
@@ -119,6 +120,8 @@ class MainWindow(QMainWindow):
         self.calibrate_btn.clicked.connect(self.calibrate_channels)
         self.check_btn = QPushButton("检查", self)
         self.check_btn.clicked.connect(self.check_camera_alignment)
+        self.rectify_btn = QPushButton("校正", self)
+        self.rectify_btn.clicked.connect(self.calibrate_perspective)
         self.start_btn = QPushButton("启动", self)
         self.stop_btn = QPushButton("停止", self)
         self.start_btn.clicked.connect(self.start_detection)
@@ -126,6 +129,7 @@ class MainWindow(QMainWindow):
         self.stop_btn.setEnabled(False)  # 初始不可用
         btn_layout.addWidget(self.calibrate_btn)
         btn_layout.addWidget(self.check_btn)
+        btn_layout.addWidget(self.rectify_btn)
         btn_layout.addWidget(self.start_btn)
         btn_layout.addWidget(self.stop_btn)
         
@@ -134,6 +138,8 @@ class MainWindow(QMainWindow):
 
         # 帧率显示
         self.fps_label = QLabel(f"帧率: {self.ocr_worker.frame_count} fps")
+        # 各阶段耗时 p50/p90/p99
+        self.profile_label = QLabel("")
 
         # 整合布局
         control_layout.addWidget(time_group)
@@ -141,18 +147,30 @@ class MainWindow(QMainWindow):
         control_layout.addWidget(threshold_group)
         control_layout.addWidget(btn_group)
         control_layout.addWidget(self.fps_label)
+        control_layout.addWidget(self.profile_label)
         
         # 添加到主布局
         main_layout.addWidget(control_container)
 
     def check_camera_alignment(self):
         """Capture and display a single frame to check camera alignment"""
-        ret, frame = self.ocr_worker.cap.read()
-        if ret:
+        frame, _ = self.ocr_worker.frames.latest()
+        if frame is not None:
             cv2.imshow("Camera Alignment Check", frame)
         else:
             QMessageBox.warning(self, "Camera Error", "无法读取摄像头画面")
 
+    def calibrate_perspective(self):
+        """标定面板透视校正，显示校正后的画面"""
+        frame, _ = self.ocr_worker.frames.latest()
+        if frame is None:
+            QMessageBox.warning(self, "Camera Error", "无法读取摄像头画面")
+            return
+        if not self.ocr_worker.calibrate_perspective(frame):
+            QMessageBox.warning(self, "校正失败", "未找到面板区域，请调整摄像头后重试")
+            return
+        cv2.imshow("Perspective Check", self.ocr_worker.rectify(frame))
+
     def _init_data_structures(self):
         """初始化数据结构"""
         self.history_data = {i: deque() for i in range(1, self.channel_num + 1)}
@@ -163,6 +181,7 @@ class MainWindow(QMainWindow):
         self.file_name = "000"
         self.begin_to_record = False
         self.calibrate_data = [10] * self.channel_num  # 调零数据
+        self.stabilizing = False  # 首次收到数据后的 2 秒稳定等待中
         return 
     def start_detection(self):
         """启动检测"""
@@ -198,6 +217,7 @@ class MainWindow(QMainWindow):
             self.threshold_input.setEnabled(False)
             self.time_input.setEnabled(False)
             self.check_btn.setEnabled(False)
+            self.rectify_btn.setEnabled(False)
             self.calibrate_btn.setEnabled(False)
         elif state == "检测完成":
             self.start_btn.setEnabled(True)
@@ -205,10 +225,11 @@ class MainWindow(QMainWindow):
             self.threshold_input.setEnabled(True)
             self.time_input.setEnabled(True)
             self.check_btn.setEnabled(True)
+            self.rectify_btn.setEnabled(True)
             self.calibrate_btn.setEnabled(True)
     def calibrate_channels(self):
         if self.ocr_worker:
-            results = self.ocr_worker.process_batch(batch_size=10)
+            results = self.ocr_worker.process_batch()
             if results and len(results) == self.channel_num:
                 self.calibrate_data = results
                 self.calibrate_data = [float(x) for x in self.calibrate_data]
@@ -228,6 +249,8 @@ class MainWindow(QMainWindow):
         self.button_state("检测完成")
         self.time_display.setText("已停止")
         self.log(f"{self.get_time_stamp()} 检测已停止")
+        # 人工停止时保存停止前几秒的画面
+        self.ocr_worker.save_evidence("operator_stop")
         self.clear_data()
 
     def finish_detection(self):
@@ -246,6 +269,8 @@ class MainWindow(QMainWindow):
         # 保存数据并记录日志
         self.save_data()
         # self.save_pic()
+        if self.ocr_worker.profiler.enabled:
+            self.log(f"各阶段耗时 p50/p90/p99: {self.ocr_worker.profiler.format('; ')}")
         self.log("检测完成")
         
         self.time_display.setText("检测完成")
@@ -266,6 +291,7 @@ class MainWindow(QMainWindow):
         # 填充数据
         table.setRowCount(4)
         threshold = float(self.threshold_input.text())
+        failed = []
 
         for channel_index in range(1, self.channel_num+1):
             initial = self.history_data[channel_index][0]
@@ -279,11 +305,18 @@ class MainWindow(QMainWindow):
             table.setItem(channel_index-1, 2, QTableWidgetItem(f"{final:.2f}"))
             table.setItem(channel_index-1, 3, QTableWidgetItem(f"{delta:+.3f}"))
 
+            if abs_delta > threshold:
+                failed.append(f"ch{channel_index}")
+
             # 状态项
             status_item = QTableWidgetItem("不合格" if abs_delta > threshold else "合格")
             status_item.setForeground(QColor(255,0,0) if abs_delta > threshold else QColor(0,128,0))
             table.setItem(channel_index-1, 4, status_item)
         
+        if failed:
+            # 不合格时保存结束前几秒的画面
+            self.ocr_worker.save_evidence("_".join(failed) + "_fail")
+
         # 调整表格
         table.resizeColumnsToContents()
         table.setEditTriggers(QTableWidget.NoEditTriggers)
@@ -302,9 +335,19 @@ class MainWindow(QMainWindow):
         self.remaining_time -= 1
         self.time_display.setText(f"剩余时间 {self.remaining_time}s")
         self.process_data()
+        self.update_fps()
         if self.remaining_time <= 0:
             self.finish_detection()
 
+    def update_fps(self):
+        """显示摄像头实测帧率、识别来不及处理而跳过的帧数和采集端未解码的帧数"""
+        stats = self.ocr_worker.cap.stats()
+        batch_size = self.ocr_worker.batch_sizer.batch_size
+        # 分发线程几乎一直在取帧，采集端丢帧通常接近 0；识别漏掉的帧看订阅者的 skipped
+        self.fps_label.setText(f"帧率: {stats.get('fps', 0.0):.1f} fps 识别跳帧: {stats['skipped']} "
+                               f"采集丢帧: {stats.get('dropped', 0)} 每批: {batch_size}帧")
+        self.profile_label.setText(self.ocr_worker.profiler.format())
+
     def resource_path(self,relative_path):
         """ 获取资源的绝对路径，兼容开发模式和 PyInstaller 打包模式 """
         if hasattr(sys, '_MEIPASS'):
@@ -314,14 +357,9 @@ class MainWindow(QMainWindow):
         return os.path.join(base_path, relative_path)
 
     def log(self, message):
-        """记录日志"""
-        log_file = os.path.join(self.dir_name, f"{self.file_name}.log")
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        try:
-            with open(log_file, 'a') as f:
-                f.write(f"[{timestamp}] {message}\n")
-        except Exception as e:
-            print(f"无法写入日志: {str(e)}")
+        """记录日志（与识别线程共用会话日志，后台写入）"""
+        if hasattr(self, 'ocr_worker'):
+            self.ocr_worker.logger.info(message, source="ui")
 
     def get_time_stamp(self):
         now = datetime.now()
@@ -351,9 +389,9 @@ class MainWindow(QMainWindow):
 
     def save_pic(self):
         """"保存图片"""
-        ret,frame = self.ocr_worker.cap.read()
+        frame, _ = self.ocr_worker.frames.latest()
         time_stamp = self.get_time_stamp()
-        if not ret:
+        if frame is None:
             self.log(f"{time_stamp}无法获取图像")
             return 
         file_name = os.path.join(self.dir_name,f"{time_stamp}.jpg")
@@ -380,11 +418,11 @@ class MainWindow(QMainWindow):
         if not hasattr(self, 'ocr_worker') or not self.ocr_worker:
             return
 
+        if self.stabilizing:
+            return
         try:
-            batch_size = 3
-            if self.remaining_time == 0 or not self.begin_to_record:
-                batch_size = 10
-            results = self.ocr_worker.process_batch(batch_size=batch_size)
+            # 在界面线程中运行，按 1 秒节拍内的默认预算自动选择帧数，开始和结束时也不例外
+            results = self.ocr_worker.process_batch()
             if results and len(results) == self.channel_num:
                 # Subtract calibrate_data from results to get zero-calibrated values
                 results = [r - c for r, c in zip(results, self.calibrate_data)]
@@ -395,8 +433,9 @@ class MainWindow(QMainWindow):
                     # self.delay_timer.setSingleShot(True)
                     # self.delay_timer.timeout.connect(self.start_recording)
                     # self.delay_timer.start(2000)  # 2秒延迟
-                    time.sleep(2)  # 2秒延迟
-                    self.start_recording()
+                    # 不阻塞界面线程：2 秒后由单次定时器开始记录
+                    self.stabilizing = True
+                    QTimer.singleShot(2000, self.end_stabilization)
                 else:
                     self.update_data(results)
                     self.log(f"获取数据: {results}")
@@ -416,11 +455,18 @@ class MainWindow(QMainWindow):
             error_msg = f"数据处理时发生错误: {str(e)}"
             self.log(error_msg)
 
+    def end_stabilization(self):
+        """稳定等待结束；等待期间已停止检测时不再开始记录"""
+        if not self.stabilizing:
+            return
+        self.stabilizing = False
+        self.start_recording()
+
     def start_recording(self):
         """开始记录数据和计时"""
         self.log("2秒稳定时间结束，开始记录数据")
         # self.timer.start(1000)
-        results = self.ocr_worker.process_batch(batch_size=10)
+        results = self.ocr_worker.process_batch()
         if results and len(results) == self.channel_num:
             results = [r - c for r, c in zip(results, self.calibrate_data)]
             self.remaining_time = self.total_time
@@ -452,6 +498,7 @@ class MainWindow(QMainWindow):
         for channel in self.history_data:
             self.history_data[channel].clear()
         self.begin_to_record = False
+        self.stabilizing = False
         self.log("数据已清除，准备下一次检测")
 
 if __name__ == "__main__":
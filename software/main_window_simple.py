@@ -25,7 +25,9 @@ class MainWindow(QMainWindow):
         self.channel_num = 4  # 通道数
 
         try:
-            self.ocr_worker = CurrentMeterReader()
+            # 检测界面开启异常取证，停止和通道失败时保存之前几秒的画面
+            self.ocr_worker = CurrentMeterReader(channel_num=self.channel_num, evidence=True)
+            self.ocr_worker.warm_up()
         except Exception as e:
             QMessageBox.critical(self, "初始化错误", f"无法初始化OCR工作线程: {str(e)}")
             self.close()
@@ -112,8 +114,8 @@ class MainWindow(QMainWindow):
 
     def check_camera_alignment(self):
         """Capture and display a single frame to check camera alignment"""
-        ret, frame = self.ocr_worker.cap.read()
-        if ret:
+        frame, _ = self.ocr_worker.frames.latest()
+        if frame is not None:
             cv2.imshow("Camera Alignment Check", frame)
         else:
             QMessageBox.warning(self, "Camera Error", "无法读取摄像头画面")
@@ -129,6 +131,7 @@ class MainWindow(QMainWindow):
         self.file_name = "000"
         self.begin_to_record = False
         self.calibrate_data = [2] * self.channel_num
+        self.stabilizing = False  # 首次收到数据后的 2 秒稳定等待中
         return 
     def start_detection(self):
         """启动检测"""
@@ -178,11 +181,13 @@ class MainWindow(QMainWindow):
         self.button_state("检测完成")
         self.time_display.setText("已停止")
         self.log(f"{self.get_time_stamp()} 检测已停止")
+        # 人工停止时保存停止前几秒的画面
+        self.ocr_worker.save_evidence("operator_stop")
         self.clear_data()
     
     def calibrate_channels(self):
         if self.ocr_worker:
-            results = self.ocr_worker.process_batch(batch_size=10)
+            results = self.ocr_worker.process_batch()
             if results and len(results) == self.channel_num:
                 self.calibrate_data = results
                 self.calibrate_data = [float(x) for x in self.calibrate_data]
@@ -227,6 +232,7 @@ class MainWindow(QMainWindow):
         # 填充数据
         table.setRowCount(8)
         threshold = float(self.threshold_input.text())
+        failed = []
 
         for channel_index in range(1, self.channel_num+1):
             initial = self.history_data[channel_index][0]
@@ -240,11 +246,18 @@ class MainWindow(QMainWindow):
             table.setItem(channel_index-1, 2, QTableWidgetItem(f"{final:.2f}"))
             table.setItem(channel_index-1, 3, QTableWidgetItem(f"{delta:+.3f}"))
 
+            if abs_delta > threshold:
+                failed.append(f"ch{channel_index}")
+
             # 状态项
             status_item = QTableWidgetItem("不合格!" if abs_delta > threshold else "合格")
             status_item.setForeground(QColor(255,0,0) if abs_delta > threshold else QColor(0,128,0))
             table.setItem(channel_index-1, 4, status_item)
         
+        if failed:
+            # 不合格时保存结束前几秒的画面
+            self.ocr_worker.save_evidence("_".join(failed) + "_fail")
+
         # 调整表格
         table.resizeColumnsToContents()
         table.setEditTriggers(QTableWidget.NoEditTriggers)
@@ -275,14 +288,9 @@ class MainWindow(QMainWindow):
         return os.path.join(base_path, relative_path)
 
     def log(self, message):
-        """记录日志"""
-        log_file = os.path.join(self.dir_name, f"{self.file_name}.log")
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        try:
-            with open(log_file, 'a') as f:
-                f.write(f"[{timestamp}] {message}\n")
-        except Exception as e:
-            print(f"无法写入日志: {str(e)}")
+        """记录日志（与识别线程共用会话日志，后台写入）"""
+        if hasattr(self, 'ocr_worker'):
+            self.ocr_worker.logger.info(message, source="ui")
 
     def get_time_stamp(self):
         now = datetime.now()
@@ -313,9 +321,9 @@ class MainWindow(QMainWindow):
 
     def save_pic(self):
         """"保存图片"""
-        ret,frame = self.ocr_worker.cap.read()
+        frame, _ = self.ocr_worker.frames.latest()
         time_stamp = self.get_time_stamp()
-        if not ret:
+        if frame is None:
             self.log(f"{time_stamp}无法获取图像")
             return 
         file_name = os.path.join(self.dir_name,f"{time_stamp}.jpg")
@@ -343,7 +351,7 @@ class MainWindow(QMainWindow):
         
         try:                    
             if not self.begin_to_record:
-                results = self.ocr_worker.process_batch(batch_size=3)
+                results = self.ocr_worker.process_batch()
                 if results and len(results) == self.channel_num:
                     if results and len(results) == self.channel_num:
                         self.begin_to_record = True
@@ -352,8 +360,9 @@ class MainWindow(QMainWindow):
                         # self.delay_timer.setSingleShot(True)
                         # self.delay_timer.timeout.connect(self.start_recording)
                         # self.delay_timer.start(2000)  # 1秒延迟
-                        time.sleep(2)  # 2秒延迟
-                        self.start_recording()
+                        # 不阻塞界面线程：2 秒后由单次定时器开始记录
+                        self.stabilizing = True
+                        QTimer.singleShot(2000, self.end_stabilization)
             else:
                 pass
 
@@ -389,11 +398,18 @@ class MainWindow(QMainWindow):
     #         error_msg = f"数据处理时发生错误: {str(e)}"
     #         self.log(error_msg)
 
+    def end_stabilization(self):
+        """稳定等待结束；等待期间已停止检测时不再开始记录"""
+        if not self.stabilizing:
+            return
+        self.stabilizing = False
+        self.start_recording()
+
     def start_recording(self):
         """开始记录数据和计时"""
         self.log("1秒稳定时间结束，开始记录数据")
         # self.timer.start(1000)
-        results = self.ocr_worker.process_batch(batch_size=10)
+        results = self.ocr_worker.process_batch()
         if results and len(results) == self.channel_num:
             results = [r - c for r, c in zip(results, self.calibrate_data)]
             self.remaining_time = self.total_time
@@ -410,6 +426,7 @@ class MainWindow(QMainWindow):
         for channel in self.history_data:
             self.history_data[channel].clear()
         self.begin_to_record = False
+        self.stabilizing = False
         self.log("数据已清除，准备下一次检测")
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import argparse
+import os
+import time
+import numpy as np
+from preprocess import RedSegmentFilter
+from detectors import ComponentDetector
+from seven_segment import SevenSegmentDecoder, render_digits
+from recognizer import CTCDecoder, PaddleRecognizer, load_numeric_chars, preprocess_crops
+from replay import ReplaySource
+from backends import BACKENDS, INT8_REC_MODEL, ONNX_REC_MODEL, REC_VARIANTS, make_rec_variant
+from station import STATION_FILE, update_station_config
+
+
+def corpus_crops(path=None, limit=2000):
+    """语料中的读数裁剪图和参照文本
+
+    给出采集目录或视频时用 ReplaySource 回放、连通域定位裁剪，七段解码可信的读数
+    以解码结果为参照（否则为 None，由 fp32 模型结果补齐）；未给出时生成合成读数，参照为真值。
+    """
+    crops, labels = [], []
+    if path:
+        source = ReplaySource(path, pacing="fast")
+        red_filter = RedSegmentFilter()
+        detector = ComponentDetector()
+        decoder = SevenSegmentDecoder(min_confidence=0.8)
+        while len(crops) < limit:
+            frame, _ = source.read_frame()
+            if frame is None:
+                break
+            binary = red_filter(frame)
+            for box in detector(binary):
+                x0, y0 = np.floor(box.min(axis=0)).astype(int)
+                x1, y1 = np.ceil(box.max(axis=0)).astype(int)
+                crop = binary[max(0, y0):y1, max(0, x0):x1].copy()
+                result = decoder.read(crop)
+                crops.append(crop)
+                labels.append(result[0] if result else None)
+        source.release()
+    else:
+        rng = np.random.default_rng(0)
+        for value in rng.uniform(-9.99, 39.99, min(limit, 500)):
+            text = f"{value:.2f}"
+            crops.append(render_digits(text, int(rng.integers(32, 64))))
+            labels.append(text)
+    return crops, labels
+
+
+def quantize(corpus=None, model_root=".", output=INT8_REC_MODEL, calibration=200):
+    """用语料裁剪图做校准，把 ONNX 识别模型静态量化为 INT8（QDQ 格式，逐通道权重）"""
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    crops, _ = corpus_crops(corpus, calibration)
+    if not crops:
+        raise RuntimeError("没有可用于校准的读数区域")
+    source = os.path.join(model_root, ONNX_REC_MODEL)
+    target = os.path.join(model_root, output)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    prepared = target + ".prep.onnx"
+    quant_pre_process(source, prepared)
+
+    class CropReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            image_shape = REC_VARIANTS["fp32"]["image_shape"]
+            self.batches = iter([{input_name: preprocess_crops([crop], image_shape)} for crop in crops])
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    input_name = onnx.load(prepared).graph.input[0].name
+    quantize_static(prepared, target, CropReader(input_name), quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+    os.remove(prepared)
+    print(f"INT8 模型: {target} ({os.path.getsize(target) / 1e6:.1f} MB，"
+          f"原模型 {os.path.getsize(source) / 1e6:.1f} MB)，校准样本 {len(crops)}")
+
+
+def model_size(model_root, name):
+    """变体模型文件大小（MB），fp32 为 Paddle 推理模型目录"""
+    model = REC_VARIANTS[name]["model"]
+    path = os.path.join(model_root, model) if model else os.path.join(model_root, 'model/rec/en_PP-OCRv4_rec_infer')
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+    return os.path.getsize(path) / 1e6 if os.path.exists(path) else float("nan")
+
+
+def char_accuracy(text, label):
+    return sum(a == b for a, b in zip(text, label)) / max(len(text), len(label), 1)
+
+
+def report(corpus=None, variants=None, backend="paddle", threads=None, model_root=".", output=None,
+           batch_size=16, repeat=5):
+    """各识别模型变体的数字准确率、单区域耗时、加载耗时和模型大小"""
+    from ocr_capture_worker import create_ocr
+
+    crops, labels = corpus_crops(corpus)
+    if not crops:
+        print("没有可用的读数区域")
+        return
+    ocr = create_ocr(backend=backend, cpu_threads=threads)
+    decoder = CTCDecoder(os.path.join(model_root, 'model/dict/en_dict.txt'),
+                         allowed=load_numeric_chars(os.path.join(model_root, 'model/dict/digital_dict.txt')))
+    rows = []
+    for name in variants or REC_VARIANTS:
+        try:
+            start = time.perf_counter()
+            recognizer = PaddleRecognizer(make_rec_variant(name, backend, getattr(ocr, 'text_recognizer', None),
+                                                           threads, model_root, getattr(ocr, 'rec_model_file', None)),
+                                          decoder)
+            recognizer([crops[0]])
+            load_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            print(f"跳过 {name}: {e}")
+            continue
+        texts = []
+        samples = []
+        for _ in range(max(1, repeat)):
+            texts = []
+            for index in range(0, len(crops), batch_size):
+                batch = crops[index:index + batch_size]
+                start = time.perf_counter()
+                texts.extend(text for text, _ in recognizer(batch))
+                samples.append((time.perf_counter() - start) * 1000 / len(batch))
+        if name == "fp32":
+            # 七段解码不可信的区域以 fp32 结果为参照
+            labels = [label if label is not None else text for label, text in zip(labels, texts)]
+        rows.append((name, texts, float(np.median(samples)), load_ms, model_size(model_root, name)))
+
+    lines = ["# 识别模型变体报告",
+             "",
+             f"语料: {corpus or '合成读数'}，读数区域 {len(crops)}，后端 {backend}，线程 {threads or '默认'}",
+             "",
+             "| 变体 | 整读数准确率 | 字符准确率 | 单区域耗时(ms) | 加载+首次推理(ms) | 模型大小(MB) |",
+             "|---|---|---|---|---|---|"]
+    for name, texts, per_crop, load_ms, size in rows:
+        pairs = [(text, label) for text, label in zip(texts, labels) if label is not None]
+        if pairs:
+            exact = f"{np.mean([text == label for text, label in pairs]):.1%}"
+            chars = f"{np.mean([char_accuracy(text, label) for text, label in pairs]):.1%}"
+        else:
+            # 没有可参照的标注（如 fp32 加载失败且七段解码全部不可信）时不计算准确率
+            exact = chars = "-"
+        lines.append(f"| {name} | {exact} | {chars} | {per_crop:.3f} | {load_ms:.0f} | {size:.1f} |")
+    text = "\n".join(lines)
+    print(text)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="识别模型变体：量化、评估与工位选择（全部离线、CPU）")
+    parser.add_argument("--model-root", default=".", help="model 目录所在位置")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    quantize_parser = subparsers.add_parser("quantize", help="生成 INT8 识别模型")
+    quantize_parser.add_argument("--corpus", help="校准用采集目录或视频，默认使用合成读数")
+    quantize_parser.add_argument("--samples", type=int, default=200)
+    report_parser = subparsers.add_parser("report", help="准确率与耗时报告")
+    report_parser.add_argument("--corpus", help="采集目录或视频，默认使用合成读数")
+    report_parser.add_argument("--variants", nargs="*", choices=list(REC_VARIANTS))
+    report_parser.add_argument("--backend", default="paddle", choices=BACKENDS)
+    report_parser.add_argument("--threads", type=int)
+    report_parser.add_argument("--output", help="报告输出文件（Markdown）")
+    select_parser = subparsers.add_parser("select", help="设置本工位使用的识别模型变体")
+    select_parser.add_argument("variant", choices=list(REC_VARIANTS))
+    select_parser.add_argument("--station-file", default=STATION_FILE)
+    args = parser.parse_args()
+
+    if args.command == "quantize":
+        quantize(args.corpus, args.model_root, calibration=args.samples)
+    elif args.command == "report":
+        report(args.corpus, args.variants, args.backend, args.threads, args.model_root, args.output)
+    elif args.command == "select":
+        update_station_config(args.station_file, "rec_variant", args.variant)
+        print(f"{args.station_file}: rec_variant = {args.variant}")
@@ -1,29 +1,141 @@
 import cv2
 import numpy as np
 from paddleocr import PaddleOCR
-import re
 import sys
-from threading import Lock
-from collections import Counter
-from datetime import datetime
 import os
+import time
+from preprocess import RedSegmentFilter, filter_red_channel
+from change_gate import ChannelChangeGate
+from seven_segment import SevenSegmentDecoder
+from detectors import make_detector
+from box_order import assign_channels, box_array, order_boxes
+from channel_tracker import ChannelTracker
+from reading_parser import ReadingParser
+from recognizer import CTCDecoder, PaddleRecognizer, load_numeric_chars, paddleocr_recognize
+from capture import CameraCapture, FrameBroker
+from replay import ReplaySource
+from profiler import StageProfiler
+from batch_sizer import AdaptiveBatchSizer
+from display_region import DisplayRegion
+from rectify import PanelRectifier, find_panel_quad
+from station import STATION_FILE, load_station_config
+from quality import FrameQualityGate
+from glyph_cache import GlyphCache
+from evidence import EvidenceBuffer
+from session_log import SessionLogger
+from synthetic import SyntheticMeters
+from backends import ONNX_DET_MODEL, ONNX_REC_MODEL, REC_VARIANTS, make_rec_variant
+
+
+def resource_path(relative_path):
+    """ 获取资源的绝对路径，兼容开发模式和 PyInstaller 打包模式 """
+    if hasattr(sys, '_MEIPASS'):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+def create_ocr(rec_batch_num=64, backend="paddle", cpu_threads=None, enable_mkldnn=False, rec_model=None):
+    """用随软件发布的检测/识别模型创建 PaddleOCR
+
+    backend 为 onnx 时检测和识别都改用本地转换的 ONNX 模型，rec_model 可指定其它识别模型
+    （如 INT8 变体）；openvino 只用于识别（见 backends.py），检测仍走 Paddle。
+    cpu_threads 为推理线程数，默认由 PaddleOCR 决定。
+    """
+    options = {}
+    if cpu_threads:
+        options["cpu_threads"] = cpu_threads
+    if backend == "onnx":
+        options["use_onnx"] = True
+        det_model_dir = resource_path(ONNX_DET_MODEL)
+        rec_model_dir = resource_path(rec_model or ONNX_REC_MODEL)
+    else:
+        det_model_dir = resource_path('model/det/en_PP-OCRv3_det_infer')
+        rec_model_dir = resource_path('model/rec/en_PP-OCRv4_rec_infer')
+    # rec_batch_num 取较大值，使一批帧的全部数字区域在一次识别推理中完成
+    ocr = PaddleOCR(
+        use_angle_cls=False, 
+        lang='en', 
+        det_model_dir=det_model_dir,
+        rec_algorithm='SVTR_LCNet', 
+        rec_model_dir=rec_model_dir,
+        rec_char_dict_path=resource_path('model/dict/en_dict.txt'),
+        rec_batch_num=rec_batch_num,
+        use_gpu=False,
+        enable_mkldnn=enable_mkldnn,
+        **options
+        )
+    # 记录已加载的识别模型，onnx 后端直接调用识别模型时复用同一个会话
+    ocr.rec_model_file = rec_model_dir if backend == "onnx" else None
+    return ocr
 
 
 class CurrentMeterReader():
-    def __init__(self):
+    def __init__(self, channel_num=4, rec_batch_num=64, segment_decoder=True, detector="neural",
+                 channel_centers=None, channel_formats=None, rec_decode="digits", source=None,
+                 profile=True, auto_crop=True, resolution=(640, 480), station_file=STATION_FILE,
+                 quality_gate=False, glyph_cache=True,
+                 backend="paddle", cpu_threads=None, enable_mkldnn=False, rec_variant=None,
+                 evidence=False, evidence_drop=0.3, evidence_jump=0.5, log_level="INFO"):
         try:
-            self.ocr = PaddleOCR(
-                use_angle_cls=False, 
-                lang='en', 
-                det_model_dir=self.resource_path('model/det/en_PP-OCRv3_det_infer'),
-                rec_algorithm='SVTR_LCNet', 
-                rec_model_dir=self.resource_path('model/rec/en_PP-OCRv4_rec_infer'),
-                rec_char_dict_path=self.resource_path('model/dict/en_dict.txt'),
-                use_gpu=False
-                )
-            self.cap = self._open_camera()
+            # 会话日志在后台线程写入；log_level="DEBUG" 时记录逐帧、逐框的识别细节
+            self.logger = SessionLogger(level=log_level)
+            # 推理后端: paddle / onnx / openvino，后两者使用本地转换的模型
+            self.backend = backend
+            self.cpu_threads = cpu_threads
+            # 识别模型变体（fp32 / int8），未指定时按工位配置
+            self.rec_variant = rec_variant or load_station_config(station_file).get("rec_variant", "fp32")
+            self.ocr = create_ocr(rec_batch_num, backend, cpu_threads, enable_mkldnn, self.variant_rec_model())
+            self.channel_num = channel_num
+            # 固定工装可给出各通道中心像素坐标，按位置直接分配通道
+            self.channel_centers = channel_centers
+            # 未给出固定位置时，按位置跟踪把检测框关联到持久的通道编号
+            self.channel_tracker = ChannelTracker(channel_num)
+            # 每个通道的 (数字位数, 小数位数)，用于确定小数点位置并校验识别结果
+            self.reading_parser = ReadingParser(channel_formats, channel_num)
+            # 分阶段耗时统计，关闭时几乎没有开销
+            self.profiler = StageProfiler(enabled=profile)
+            self.batch_count = 0
+            # 按实测单帧耗时自动选择每批帧数
+            self.batch_sizer = AdaptiveBatchSizer()
+            self.red_filter = RedSegmentFilter(self.profiler)
+            # 显示区域裁剪：只对数码管所在区域做预处理，检测在缩小的区域图上进行，
+            # 识别仍按原分辨率裁剪，因此可以提高摄像头分辨率而不成比例增加耗时
+            self.display_region = DisplayRegion() if auto_crop else None
+            self.region_filter = RedSegmentFilter(self.profiler)
+            self.region_binary = None
+            self.region_binary_rect = None
+            self.resolution = resolution
+            # 模糊、反光、曝光异常的帧在识别前丢弃；阈值随工位而定，需先按 quality.py 的说明标定，
+            # 默认关闭，启用时从工位配置的 quality_gate 项读取阈值
+            self.quality_gate = None
+            if quality_gate:
+                self.quality_gate = FrameQualityGate(**load_station_config(station_file).get("quality_gate", {}))
+            # 字形 -> 字符缓存，七段解码不可信的读数先按字形查表
+            self.glyph_cache = GlyphCache() if glyph_cache else None
+            # 工位透视校正参数，未标定时不做校正
+            self.station_file = station_file
+            self.rectifier = PanelRectifier.load(station_file)
+            # neural: PaddleOCR DB 检测；component: 连通域定位，适用于固定工装
+            self.detector = make_detector(detector, self.ocr)
+            self.change_gate = ChannelChangeGate()
+            # 七段数码管解码为主路径，置信度不足时回退到 PaddleOCR 识别
+            self.segment_decoder = SevenSegmentDecoder() if segment_decoder else None
+            # digits: 识别输出限制为数字、小数点和负号；full: 使用完整英文字典
+            self.rec_model = self._create_rec_model(rec_decode)
+            # source 为空时打开摄像头；可传入录制目录/视频路径或 ReplaySource 离线回放
+            self.frames = FrameBroker(self._open_source(source))
+            self.cap = self.frames.subscribe()
+            # 最近几秒的压缩帧留在内存中，通道失败、置信度下降或读数跳变时保存到会话目录；
+            # 需要后台线程持续压缩，默认关闭，由检测界面开启
+            self.evidence = EvidenceBuffer(self.frames) if evidence else None
+            # 置信度比该通道的平均水平低 evidence_drop（比例）、读数跳变超过 evidence_jump 时触发
+            self.evidence_drop = evidence_drop
+            self.evidence_jump = evidence_jump
+            self.confidence_baseline = [None] * channel_num
+            self.last_results = None
             self.frame_count = 5
-            self.float_pattern = re.compile(r'^-?\d+\.?\d*$')
             self.dir_name = "000"  # Add this line to store the directory name for logging
             self.file_name = "000"  # Add this line to store the file name for logging
         except Exception as e:
@@ -31,76 +143,392 @@ class CurrentMeterReader():
             raise
     def resource_path(self,relative_path):
         """ 获取资源的绝对路径，兼容开发模式和 PyInstaller 打包模式 """
-        if hasattr(sys, '_MEIPASS'):
-            base_path = sys._MEIPASS
-        else:
-            base_path = os.path.abspath(".")
-        return os.path.join(base_path, relative_path)
+        return resource_path(relative_path)
     def __del__(self):
         """资源清理"""
-        if hasattr(self, 'cap') and self.cap.isOpened():
-            self.cap.release()
+        if getattr(self, 'evidence', None) is not None:
+            self.evidence.close()
+        if hasattr(self, 'logger'):
+            self.logger.close()
+        if hasattr(self, 'frames') and self.frames.isOpened():
+            self.frames.release()
 
     def set_file_name(self, file_name):
         """设置文件名称"""
         self.file_name = file_name
+        self.logger.set_path(os.path.join(self.dir_name, f"{self.file_name}.log"))
     def set_dir_name(self, dir_name):
         """设置目录名称"""
         self.dir_name = dir_name
         if not os.path.exists(dir_name):
             os.makedirs(dir_name)
+        self.logger.set_path(os.path.join(self.dir_name, f"{self.file_name}.log"))
     def process_frame(self, frame):
         """优化单帧处理"""
+        return self.process_frames([frame])[0]
+
+    def process_frames(self, frames):
+        """批量处理多帧：未变化的通道复用读数，其余数字区域一次性识别"""
+        jobs = []
+        plans = [None] * len(frames)
+        rejected = []
+        for index, frame in enumerate(frames):
+            try:
+                frame = self.rectify(frame)
+                rect = self.next_region(frame.shape)
+                if self.quality_gate is not None:
+                    with self.profiler.stage("quality"):
+                        reason, sharpness = self.quality_gate.check(frame, rect, self.change_gate.boxes)
+                    if reason:
+                        if self.logger.debug_enabled:
+                            self.log(f"[DEBUG] 第{index+1}帧画面质量不合格({reason})，跳过识别")
+                        rejected.append((sharpness, index))
+                        continue
+                plans[index] = self.plan_frame(self.preprocess(frame, rect), jobs, rect)
+            except Exception as e:
+                self.log(f"[ERROR] 帧处理失败: {e}")
+
+        if rejected and len(rejected) == len(frames):
+            # 整批都不合格时仍识别最清晰的一帧，避免阈值不适合现场时完全没有读数
+            _, index = max(rejected)
+            try:
+                frame = self.rectify(frames[index])
+                rect = self.next_region(frame.shape)
+                plans[index] = self.plan_frame(self.preprocess(frame, rect), jobs, rect)
+            except Exception as e:
+                self.log(f"[ERROR] 帧处理失败: {e}")
+
+        pending = [job for job in jobs if job[1] is None]
+        if pending:
+            try:
+                with self.profiler.stage("recognize"):
+                    results = self.recognize([job[0] for job in pending], [job[2] for job in pending])
+                for job, result in zip(pending, results):
+                    job[1] = result
+                    if self.glyph_cache is not None:
+                        self.glyph_cache.store(job[3], *result)
+            except Exception as e:
+                self.log(f"[ERROR] 批量识别失败: {e}")
+                return [[] for _ in frames]
+        rec_results = [job[1] for job in jobs]
+        return [self.resolve_frame(plan, rec_results) if plan else [] for plan in plans]
+
+    def queue_crop(self, crop, jobs, channel=None):
+        """登记一个待识别区域并返回序号
+
+        数码管解码可信时直接得到结果；否则查字形缓存，全部命中时同样不需要识别，
+        剩下的留给 PaddleOCR，识别后按字形写回缓存。
+        """
+        result = None
+        keys = None
+        if self.segment_decoder:
+            with self.profiler.stage("segment"):
+                result = self.segment_decoder.read(crop)
+        if result is None and self.glyph_cache is not None:
+            with self.profiler.stage("glyph"):
+                keys = self.glyph_cache.split(crop)
+                result = self.glyph_cache.lookup(keys)
+        jobs.append([crop, result, channel, keys])
+        return len(jobs) - 1
+
+    def rectify(self, frame):
+        """按标定的单应矩阵把面板校正为正视、固定尺寸的图像（复用缓冲区）"""
+        if self.rectifier is None:
+            return frame
+        with self.profiler.stage("rectify"):
+            return self.rectifier(frame)
+
+    def calibrate_perspective(self, frame=None):
+        """查找面板四边形并保存透视校正参数，返回是否成功"""
+        if frame is None:
+            frame, _ = self.frames.latest()
+            if frame is None:
+                return False
+        quad = find_panel_quad(frame, self.red_filter(frame))
+        if quad is None:
+            self.log("[ERROR] 未找到面板区域，透视校正失败")
+            return False
+        self.rectifier = PanelRectifier(quad)
+        self.rectifier.save(self.station_file)
+        # 坐标系改变，已有的通道位置全部作废
+        self.change_gate.reset()
+        self.channel_tracker.reset()
+        if self.display_region is not None:
+            self.display_region.invalidate()
+        self.log(f"[INFO] 透视校正: 面板 {quad.tolist()} -> {self.rectifier.size}")
+        return True
+
+    def next_region(self, shape):
+        """本帧使用的显示区域 (x, y, w, h)，为 None 时整帧处理"""
+        if self.display_region is None:
+            return None
+        rect = self.display_region.next_frame(shape)
+        if rect is None and self.change_gate.boxes is not None:
+            # 区域到期重新定位：放弃跟踪，本帧整帧检测
+            self.change_gate.reset()
+        return rect
+
+    def plan_frame(self, binary, jobs, rect=None):
+        """确定一帧中需要识别的区域，登记到 jobs
+
+        返回 (模式, 通道框, 槽位, 显示区域, 重新定位的框)，槽位为 (识别序号或 None, 签名, 复用读数)。
+        未跟踪通道框时整帧检测；已跟踪时逐通道比较签名，未变化的通道直接复用读数；
+        个别通道识别失败被丢弃后，只为这些通道检测并按跟踪器的预测位置重新定位。
+        """
+        gate = self.change_gate
+        slots = []
+        if gate.boxes is None:
+            with self.profiler.stage("detect"):
+                boxes = self.detect_boxes(binary, rect)
+            gate.count_processed(len(boxes))
+            for box in boxes:
+                crop = self.crop_box(binary, box)
+                slots.append((self.queue_crop(crop, jobs), gate.signature(crop), None))
+            return ("detect", boxes, slots, rect, None)
+
+        relocated = self.relocate_channels(binary, rect)
+        for channel, box in enumerate(gate.boxes):
+            if box is None:
+                box = relocated.get(channel)
+                if box is None:
+                    slots.append((None, None, None))
+                    continue
+                crop = self.crop_box(binary, box)
+                gate.count_processed(1)
+                slots.append((self.queue_crop(crop, jobs, channel), gate.signature(crop), None))
+                continue
+            crop = self.crop_box(binary, box)
+            signature = gate.signature(crop)
+            reading = gate.lookup(channel, signature)
+            if reading is None:
+                slots.append((self.queue_crop(crop, jobs, channel), signature, None))
+            else:
+                slots.append((None, signature, reading))
+        return ("tracked", gate.boxes, slots, rect, relocated)
+
+    def relocate_channels(self, binary, rect=None):
+        """为门控中已丢弃的通道检测并匹配新框，返回 {通道: 框}"""
+        missing = [channel for channel, box in enumerate(self.change_gate.boxes) if box is None]
+        if not missing:
+            return {}
+        with self.profiler.stage("detect"):
+            boxes = self.detect_boxes(binary, rect)
+        if not boxes:
+            return {}
+        if self.channel_centers is not None:
+            centers = np.asarray(self.channel_centers, dtype=np.float32).reshape(-1, 2)[missing]
+            assigned = assign_channels(boxes, centers)
+            found = {channel: int(k) for channel, k in zip(missing, assigned) if k >= 0}
+        else:
+            found = self.channel_tracker.locate(boxes, missing)
+        return {channel: boxes[k] for channel, k in found.items()}
+
+    def resolve_frame(self, plan, rec_results):
+        """把识别结果填回一帧的各通道，并刷新门控参考"""
+        mode, boxes, slots, rect, relocated = plan
+        gate = self.change_gate
+        region = self.display_region
+        if mode == "detect":
+            channels = self.assemble_readings(boxes, [rec_results[job] for job, _, _ in slots])
+            readings = [entry[1] if entry else None for entry in channels]
+            if channels and all(channels):
+                gate.track([boxes[i] for i, _ in channels],
+                           [slots[i][1] for i, _ in channels], readings)
+                if region is not None and rect is None:
+                    region.update([boxes[i] for i, _ in channels])
+            elif region is not None and rect is not None:
+                # 区域内找不全通道，可能是画面移动，下一帧整帧重新定位
+                region.invalidate()
+            return readings
+
+        # 同一批次中门控可能已被前面的帧改动，此时只输出读数不再回写
+        current = boxes is gate.boxes
+        readings = []
+        for channel, (job, signature, reading) in enumerate(slots):
+            if job is not None:
+                text, score = rec_results[job]
+                with self.profiler.stage("parse"):
+                    reading = (self.reading_parser.parse(text, score, channel)
+                               if score >= self.ocr.drop_score else None)
+                if self.logger.debug_enabled:
+                    self.log(f"[DEBUG] 通道{channel+1}识别结果: {text} -> {reading}")
+                if current and channel in relocated:
+                    # 重新定位的通道读数有效才恢复跟踪，否则下一帧继续定位
+                    if reading is not None:
+                        gate.relocate(channel, relocated[channel], signature, reading)
+                elif current and reading is None:
+                    # 只丢弃该通道的框，其它通道继续复用
+                    self.log(f"[DEBUG] 通道{channel+1}识别失败，重新定位该通道")
+                    gate.drop(channel)
+                    current = gate.boxes is not None
+                elif current:
+                    gate.update(channel, signature, reading)
+            readings.append(reading)
+        return readings
+
+    def preprocess(self, frame, rect=None):
+        """红色数码管提取并二值化（结果为复用缓冲区，下一帧会覆盖）
+
+        给出显示区域时只处理区域内像素，结果放回整帧大小的缓冲区（区域外为 0），
+        后续的框坐标仍以整帧为准。
+        """
+        if rect is None:
+            return self.red_filter(frame)
+        x, y, w, h = rect
+        binary = self.region_filter(frame[y:y + h, x:x + w])
+        if (self.region_binary is None or self.region_binary.shape != frame.shape[:2]
+                or self.region_binary_rect != rect):
+            self.region_binary = np.zeros(frame.shape[:2], dtype=np.uint8)
+            self.region_binary_rect = rect
+        self.region_binary[y:y + h, x:x + w] = binary
+        return self.region_binary
+
+    def detect_boxes(self, binary, rect=None):
+        """文本检测，只返回四点框
+
+        有显示区域时只检测区域内部；输入宽于 detect_width 时先缩小再检测，框坐标换算回整帧。
+        """
+        if self.display_region is None:
+            return self.detector(binary)
+        x, y, w, h = rect if rect is not None else (0, 0, binary.shape[1], binary.shape[0])
+        image = binary[y:y + h, x:x + w]
+        scale = self.display_region.detect_scale(w)
+        if scale < 1.0:
+            image = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+        boxes = self.detector(image)
+        offset = np.float32([x, y])
+        return [np.asarray(box, dtype=np.float32) / scale + offset for box in boxes]
+
+    def crop_box(self, binary, box):
+        """按四点框透视裁剪二值图"""
+        points = np.asarray(box, dtype=np.float32)
+        width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+        height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+        width, height = max(width, 1), max(height, 1)
+        target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+        matrix = cv2.getPerspectiveTransform(points, target)
+        return cv2.warpPerspective(binary, matrix, (width, height),
+                                   borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+
+    def recognize(self, crops, channels=None):
+        """一次识别推理，按输入顺序返回 (文本, 置信度)；channels 给出已知通道以使用读数格式先验"""
+        if self.rec_model is not None:
+            formats = None
+            if channels:
+                formats = [self.reading_parser.formats[c] if c is not None else None for c in channels]
+            return self.rec_model(crops, formats)
+        # 识别模型需要三通道输入
+        return paddleocr_recognize(self.ocr, [cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR) for crop in crops])
+
+    def assemble_readings(self, boxes, rec_results):
+        """解析识别文本并关联到通道
+
+        返回每个通道的 (框序号, (读数, 置信度))，缺失的通道为 None。
+        先按通用规则筛出数字框用于通道关联，再按所属通道的读数格式解析。
+        """
         try:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            filtered_frame = self.filter_red_channel(rgb_frame)
-            gray = cv2.cvtColor(filtered_frame, cv2.COLOR_RGB2GRAY)
-            _, binary = cv2.threshold(gray, 40, 255, cv2.THRESH_BINARY)
-
-            result = self.ocr.ocr(binary, cls=False)
-            if not result or not result[0]:
-                return []
-
-            boxes = [line[0] for line in result[0]]
-            texts = [line[1][0] for line in result[0]]
-            self.log(f"[DEBUG] 处理前识别结果: {texts}")
+            kept = [(i, text, score) for i, (text, score) in enumerate(rec_results)
+                    if score >= self.ocr.drop_score]
+            if self.logger.debug_enabled:
+                self.log(f"[DEBUG] 处理前识别结果: {[text for _, text, _ in kept]}")
             valid_boxes = []
-            for box, text in zip(boxes, texts):
-                parsed = self.parse_reading(text)
-                # self.float_pattern
-                self.log(f"[DEBUG] 处理后识别结果: {parsed}")
+            for i, text, score in kept:
+                with self.profiler.stage("parse"):
+                    parsed = self.parse_reading(text)
+                if self.logger.debug_enabled:
+                    self.log(f"[DEBUG] 处理后识别结果: {parsed}")
                 if parsed is not None:
-                    valid_boxes.append((box, parsed))
-            
-            sorted_boxes = self.sort_boxes([b[0] for b in valid_boxes])
-            current_readings = [vb[1] for sb in sorted_boxes 
-                              for vb in valid_boxes if np.array_equal(sb, vb[0])]
-                
-            return current_readings
+                    valid_boxes.append((i, text, score))
+
+            valid_array = box_array([boxes[i] for i, _, _ in valid_boxes])
+            if self.channel_centers is not None:
+                assigned = assign_channels(valid_array, self.channel_centers)
+            else:
+                with self.profiler.stage("sort"):
+                    order = order_boxes(valid_array)
+                tracked = self.channel_tracker.assign(valid_array[order], [valid_boxes[k][2] for k in order])
+                assigned = np.full(len(tracked), -1, dtype=np.intp)
+                assigned[tracked >= 0] = order[tracked[tracked >= 0]]
+            channels = []
+            for channel, k in enumerate(assigned):
+                reading = None
+                if k >= 0:
+                    i, text, score = valid_boxes[k]
+                    with self.profiler.stage("parse"):
+                        reading = self.reading_parser.parse(text, score, channel)
+                channels.append((i, reading) if reading else None)
+            return channels
         except Exception as e:
             self.log(f"[ERROR] 帧处理失败: {e}")
-            return []
+            return [None] * self.channel_num
+
+    def _create_rec_model(self, rec_decode="digits"):
+        """在所选后端上直接调用识别模型；digits 解码时只保留数码管字符
+
+        paddle 后端复用 PaddleOCR 已加载的预测器，fp32 模型 full 解码时直接走 PaddleOCR。
+        """
+        if self.backend == "paddle" and rec_decode != "digits" and self.rec_variant == "fp32":
+            return None
+        try:
+            backend = make_rec_variant(self.rec_variant, self.backend, getattr(self.ocr, 'text_recognizer', None),
+                                       self.cpu_threads, self.resource_path('.'),
+                                       getattr(self.ocr, 'rec_model_file', None))
+        except (RuntimeError, ValueError, OSError) as e:
+            # 缺少运行库或模型文件、模型无法加载（backends 统一转为 RuntimeError）、未知变体时回退，
+            # 其它异常属于程序错误，照常抛出
+            print(f"[WARN] 识别模型加载失败({e})，使用 PaddleOCR 完整字典解码")
+            return None
+        allowed = None
+        if rec_decode == "digits":
+            allowed = load_numeric_chars(self.resource_path('model/dict/digital_dict.txt'))
+        decoder = CTCDecoder(self.resource_path('model/dict/en_dict.txt'), allowed=allowed)
+        return PaddleRecognizer(backend, decoder)
+
+    def variant_rec_model(self):
+        """onnx 后端下识别模型变体对应的模型文件，由 PaddleOCR 加载一次，直接识别时复用其会话"""
+        model = REC_VARIANTS.get(self.rec_variant, {}).get("model")
+        if self.backend != "onnx" or not model or not os.path.exists(self.resource_path(model)):
+            return None
+        return model
+
+    def warm_up(self, rounds=2):
+        """用合成画面跑几遍检测和识别，使首批读数不受首次推理开销影响
+
+        需由调用方显式调用（检测界面在启动时调用），构造读数器本身不预热。
+        只调用检测器和识别模型，不改动门控、跟踪、缓存等状态。
+        """
+        start = time.perf_counter()
+        width, height = self.resolution
+        frame, _ = SyntheticMeters(width=width, height=height, noise=0).render(["8.88", "12.34", "56.70", "-9.05"])
+        binary = self.red_filter(frame).copy()
+        boxes = []
+        for _ in range(rounds):
+            boxes = self.detector(binary)
+        crops = [self.crop_box(binary, box) for box in boxes]
+        if crops:
+            for batch in (crops[:1], crops, crops * self.batch_sizer.max_frames):
+                for _ in range(rounds):
+                    self.recognize(batch)
+        print(f"[INFO] 模型预热完成 ({self.backend}/{self.rec_variant})，耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
 
     def log(self, text):
-        """记录日志"""
-        if not hasattr(self, 'dir_name'):
+        """记录日志，级别取自消息开头的 [DEBUG]/[ERROR] 等标签"""
+        if not hasattr(self, 'logger'):
             return
-        log_file = os.path.join(self.dir_name, f"{self.file_name}.log")
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        try:
-            with open(log_file, 'a') as f:
-                f.write(f"[{timestamp}] {text}\n")
-        except Exception as e:
-            print(f"无法写入日志: {str(e)}")
+        self.logger.tagged(text, source="reader")
+
+    def _open_source(self, source):
+        if source is None:
+            return self._open_camera()
+        if isinstance(source, str):
+            return ReplaySource(source)
+        return source
 
     def _open_camera(self):
-        for i in range(5):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                return cap
-        raise RuntimeError("No available camera.")
+        """后台抓帧、只解码最新帧的摄像头，接口与 cv2.VideoCapture 兼容"""
+        width, height = self.resolution
+        return CameraCapture(width=width, height=height)
 
     def sharpen_image(self, image):
         """对图像进行锐化处理"""
@@ -112,122 +540,29 @@ class CurrentMeterReader():
 
     def filter_red_channel(self,rgb_frame):
         """保留红色区域并滤除白色噪声"""
-        hsv = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2HSV)
-        # 红色 HSV 区间
-        lower_red1 = np.array([0, 100, 100])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([160, 100, 100])
-        upper_red2 = np.array([180, 255, 255])
-        red_mask = cv2.inRange(hsv, lower_red1, upper_red1) | cv2.inRange(hsv, lower_red2, upper_red2)
-
-        # 去除白色区域：R、G、B都大且差值小
-        rgb_array = rgb_frame.astype(np.int16)
-        r, g, b = rgb_array[..., 0], rgb_array[..., 1], rgb_array[..., 2]
-        white_mask = ((np.abs(r - g) < 20) & (np.abs(r - b) < 20) & (r > 200)).astype(np.uint8) * 255
-
-        # 从红色掩码中去除白色部分
-        red_mask_no_white = cv2.bitwise_and(red_mask, cv2.bitwise_not(white_mask))
-
-        # 应用掩码获取最终图像
-        red_filtered = cv2.bitwise_and(rgb_frame, rgb_frame, mask=red_mask_no_white)
-
-        return red_filtered
+        return filter_red_channel(rgb_frame)
 
     def sort_boxes(self, boxes):
         """按从上到下、从左到右排序，带动态行列判断"""
-        if not boxes:
-            return []
-        
-        # 计算所有框的统计特征
-        heights = [abs(box[2][1] - box[0][1]) for box in boxes]
-        widths = [abs(box[2][0] - box[0][0]) for box in boxes]
-        median_height = sorted(heights)[len(heights)//2]
-        median_width = sorted(widths)[len(widths)//2]
-        
-        # 动态阈值（基于中位数）
-        row_thresh = median_height * 0.6  # 经验值
-        col_thresh = median_width * 0.8
-        
-        # 获取中心坐标并带原始索引
-        centers = [(
-            (box[0][0]+box[2][0])/2, 
-            (box[0][1]+box[2][1])/2,
-            i
-        ) for i, box in enumerate(boxes)]
-        
-        # 先按Y轴粗排序
-        centers_sorted = sorted(centers, key=lambda x: x[1])
-        
-        # 动态行分组（改进算法）
-        rows = []
-        current_row = [centers_sorted[0]]
-        for point in centers_sorted[1:]:
-            # 动态计算当前行基准Y（取当前行中点）
-            base_y = np.mean([p[1] for p in current_row])
-            if abs(point[1] - base_y) > row_thresh:
-                rows.append(current_row)
-                current_row = [point]
-            else:
-                current_row.append(point)
-        rows.append(current_row)
-        
-        # 行内处理：先分列再排序
-        sorted_boxes = []
-        for row in rows:
-            # 按X坐标排序
-            row_sorted = sorted(row, key=lambda x: x[0])
-            
-            # 列分组
-            columns = []
-            current_col = [row_sorted[0]]
-            for point in row_sorted[1:]:
-                base_x = np.mean([p[0] for p in current_col])
-                if abs(point[0] - base_x) > col_thresh:
-                    columns.append(current_col)
-                    current_col = [point]
-                else:
-                    current_col.append(point)
-            columns.append(current_col)
-            
-            # 列内按Y微调（处理垂直排列）
-            for col in columns:
-                col_sorted = sorted(col, key=lambda x: x[1])
-                sorted_boxes.extend([boxes[p[2]] for p in col_sorted])
-        
-        return sorted_boxes
+        return [boxes[i] for i in order_boxes(boxes)]
     def parse_reading(self, text):
-        text = text.replace(',', '').replace('.', '').replace(" ","")
-        text = text.replace('o', '0').replace('O', '0').replace('Q', '0').replace('D', '0') 
-        text = text.replace('l', '1').replace('I', '1').replace('i', '1').replace('L', '1').replace('J', '1')
-        text = text.replace('z', '2').replace('Z', '2')
-        text = text.replace('s', '5').replace('S', '5')
-        text = text.replace('G', '6')
-        text = text.replace('t', '7').replace('T', '7')
-        text = text.replace('B', '8')
-        text = text.replace('q', '9')
-        if len(text) == 3:
-            text = text[0] + '.' + text[1:]
-        elif len(text) == 4:
-            text = text[:2] + '.' + text[2:]
-        # self.log(f"[DEBUG] 解析结果: {text}")
-        if self.float_pattern.match(text):
-            return float(text)
-        return None
-
-    def filter_frame_by_channel(self, current_readings):
-        """按众数滤波"""
-        lengths = [len(frame) for frame in current_readings]
-        if not lengths:
-            return []
-        most_common_length = Counter(lengths).most_common(1)[0][0]
-        return [frame for frame in current_readings if len(frame) == most_common_length]
+        """按通用规则解析读数，无法解析时返回 None"""
+        parsed = self.reading_parser.parse(text)
+        return parsed[0] if parsed else None
 
-    def median_filter(self, current_readings):
-        """中值滤波处理"""
-        if not current_readings:
+    def median_filter(self, channel_readings):
+        """逐通道按置信度加权取中值，任一通道整批没有读数时返回空列表"""
+        if not channel_readings or not all(channel_readings):
             return []
-        data_by_channel = np.array(current_readings, dtype=np.float32).T
-        medians = [float(np.median(channel)) for channel in data_by_channel]
+        medians = []
+        for readings in channel_readings:
+            values, weights = np.array(readings, dtype=np.float32).T
+            order = np.argsort(values, kind="stable")
+            cumulative = np.cumsum(weights[order])
+            if cumulative[-1] <= 0:
+                medians.append(float(np.median(values)))
+                continue
+            medians.append(float(values[order][np.searchsorted(cumulative, cumulative[-1] / 2)]))
         return medians
     def process_data(self,results):
         """处理数据"""
@@ -238,28 +573,98 @@ class CurrentMeterReader():
         except Exception as e:
             self.log(f"[EXCEPTION] 后处理时出错: {e}")
             return []
-    def process_batch(self, batch_size=5):
-        """处理一秒内的图像"""
-        frames_data_reading = []
+    def process_batch(self, batch_size=None, budget=None):
+        """处理一秒内的图像；未指定 batch_size 时按 budget 秒（默认 0.8 秒）自动选择帧数"""
+        if batch_size is None:
+            batch_size = self.batch_sizer.next_size(budget)
+        start = time.perf_counter()
+        with self.profiler.stage("batch"):
+            results, frame_count = self._process_batch(batch_size)
+        self.batch_sizer.update(frame_count, time.perf_counter() - start)
+        if self.logger.debug_enabled:
+            self.log(f"[DEBUG] 批量帧数: {self.batch_sizer.stats()}")
+        self.batch_count += 1
+        if self.profiler.enabled and self.batch_count % 10 == 0:
+            self.log(f"[PROFILE] 各阶段耗时 p50/p90/p99: {self.profiler.format('; ')}")
+        return results
+
+    def _process_batch(self, batch_size):
+        frames = []
         for index in range(batch_size):
             ret, frame = self.cap.read()
             if not ret:
                 self.log(f"[ERROR] 第{index+1}帧无法读取摄像头画面")
                 break
+            frames.append(frame)
 
-            readings = self.process_frame(frame)
-            self.log(f"[DEBUG] 第{index+1}帧识别结果：{readings}")
-            if readings:
-                frames_data_reading.append(readings)
+        # 每个通道独立成流，某一通道偶尔缺失不影响其它通道
+        channel_readings = [[] for _ in range(self.channel_num)]
+        debug = self.logger.debug_enabled
+        for index, readings in enumerate(self.process_frames(frames)):
+            if debug:
+                self.log(f"[DEBUG] 第{index+1}帧识别结果：{[r and f'{r[0]:g}@{r[1]:.2f}' for r in readings]}")
+            for channel, reading in enumerate(readings):
+                if reading is not None:
+                    channel_readings[channel].append(reading)
+        if debug:
+            self.log(f"[DEBUG] 各通道有效帧数: {[len(readings) for readings in channel_readings]}")
+            self.log(f"[DEBUG] 通道门控统计: {self.change_gate.stats()}")
+            if self.display_region is not None:
+                self.log(f"[DEBUG] 显示区域: {self.display_region.stats()}")
+            if self.quality_gate is not None:
+                self.log(f"[DEBUG] 画面质量: {self.quality_gate.stats()}")
+            if self.glyph_cache is not None:
+                self.log(f"[DEBUG] 字形缓存: {self.glyph_cache.stats()}")
+            if self.segment_decoder:
+                self.log(f"[DEBUG] 数码管解码: {self.segment_decoder.decoded}, "
+                         f"回退 PaddleOCR: {self.segment_decoder.fallback}")
 
-        if not frames_data_reading:
+        if not any(channel_readings):
             print("暂无数据")
-            return []
+            self.check_evidence(channel_readings, [])
+            return [], len(frames)
 
         try:
-            filtered = self.filter_frame_by_channel(frames_data_reading)
-            results = self.median_filter(filtered)
-            return results
+            with self.profiler.stage("median"):
+                results = self.median_filter(channel_readings)
         except Exception as e:
             self.log(f"[EXCEPTION] 后处理时出错: {e}")
-            return []
+            return [], len(frames)
+        self.check_evidence(channel_readings, results)
+        return results, len(frames)
+
+    def check_evidence(self, channel_readings, results):
+        """通道整批无读数、平均置信度明显下降或读数相对上一批跳变时保存取证帧"""
+        if self.evidence is None:
+            return
+        reasons = []
+        for channel, readings in enumerate(channel_readings):
+            if not readings:
+                # 首次读到数据之前缺通道是正常的
+                if self.last_results is not None:
+                    reasons.append(f"ch{channel+1}_failed")
+                continue
+            confidence = float(np.mean([conf for _, conf in readings]))
+            baseline = self.confidence_baseline[channel]
+            if baseline is not None and confidence < baseline * (1 - self.evidence_drop):
+                reasons.append(f"ch{channel+1}_low_confidence")
+            else:
+                self.confidence_baseline[channel] = (confidence if baseline is None
+                                                     else 0.8 * baseline + 0.2 * confidence)
+        if results and self.last_results:
+            for channel, (value, last) in enumerate(zip(results, self.last_results)):
+                if abs(value - last) > self.evidence_jump:
+                    reasons.append(f"ch{channel+1}_jump")
+        if results:
+            self.last_results = results
+        if reasons:
+            self.save_evidence("+".join(reasons))
+
+    def save_evidence(self, reason):
+        """把环形缓冲中的帧保存到会话目录，未开始检测（无会话目录）时不保存"""
+        if self.evidence is None or not os.path.isdir(self.dir_name):
+            return None
+        path = self.evidence.dump(self.dir_name, reason)
+        if path:
+            self.log(f"[INFO] 保存取证帧({reason}): {path} {self.evidence.stats()}")
+        return path
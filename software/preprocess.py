@@ -0,0 +1,93 @@
+import cv2
+import numpy as np
+
+
+# 红色 HSV 区间（OpenCV 色调范围 0~180）
+RED_RANGES = (
+    (np.array([0, 100, 100], dtype=np.uint8), np.array([10, 255, 255], dtype=np.uint8)),
+    (np.array([160, 100, 100], dtype=np.uint8), np.array([180, 255, 255], dtype=np.uint8)),
+)
+GRAY_THRESHOLD = 40
+
+
+def filter_red_channel(rgb_frame):
+    """保留红色区域并滤除白色噪声（原始实现，作为基准保留）"""
+    hsv = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2HSV)
+    (lower_red1, upper_red1), (lower_red2, upper_red2) = RED_RANGES
+    red_mask = cv2.inRange(hsv, lower_red1, upper_red1) | cv2.inRange(hsv, lower_red2, upper_red2)
+
+    # 去除白色区域：R、G、B都大且差值小
+    rgb_array = rgb_frame.astype(np.int16)
+    r, g, b = rgb_array[..., 0], rgb_array[..., 1], rgb_array[..., 2]
+    white_mask = ((np.abs(r - g) < 20) & (np.abs(r - b) < 20) & (r > 200)).astype(np.uint8) * 255
+
+    # 从红色掩码中去除白色部分
+    red_mask_no_white = cv2.bitwise_and(red_mask, cv2.bitwise_not(white_mask))
+
+    # 应用掩码获取最终图像
+    red_filtered = cv2.bitwise_and(rgb_frame, rgb_frame, mask=red_mask_no_white)
+
+    return red_filtered
+
+
+def reference_binarize(frame):
+    """原始预处理流程：BGR→RGB→红色过滤→灰度→阈值"""
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    filtered_frame = filter_red_channel(rgb_frame)
+    gray = cv2.cvtColor(filtered_frame, cv2.COLOR_RGB2GRAY)
+    _, binary = cv2.threshold(gray, GRAY_THRESHOLD, 255, cv2.THRESH_BINARY)
+    return binary
+
+
+class RedSegmentFilter():
+    """直接在 BGR 帧上生成红色数码管二值图，缓冲区跨帧复用
+
+    二值结果 = 红色 HSV 掩码 & (灰度 > 阈值)，与 reference_binarize 逐像素一致：
+    被掩码置零的像素灰度为 0，不会通过阈值；白色掩码要求饱和度 < 50，
+    与 S >= 100 的红色区间不相交，因此省去整帧 int16 转换。
+    """
+
+    def __init__(self, profiler=None):
+        self.shape = None
+        # 可选的 StageProfiler，分别统计颜色转换、红色掩码和阈值耗时
+        self.profiler = profiler
+
+    def _allocate(self, shape):
+        height, width = shape[:2]
+        self.hsv = np.empty((height, width, 3), dtype=np.uint8)
+        self.mask_low = np.empty((height, width), dtype=np.uint8)
+        self.mask_high = np.empty((height, width), dtype=np.uint8)
+        self.gray = np.empty((height, width), dtype=np.uint8)
+        self.binary = np.empty((height, width), dtype=np.uint8)
+        self.shape = shape
+
+    def __call__(self, frame):
+        """返回内部缓冲区中的二值图，下一次调用会被覆盖，需要保留时请 copy()"""
+        if frame.shape != self.shape:
+            self._allocate(frame.shape)
+        if self.profiler is None or not self.profiler.enabled:
+            self._convert(frame)
+            self._threshold()
+            self._mask()
+        else:
+            with self.profiler.stage("color"):
+                self._convert(frame)
+            with self.profiler.stage("threshold"):
+                self._threshold()
+            with self.profiler.stage("mask"):
+                self._mask()
+        return self.binary
+
+    def _convert(self, frame):
+        cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=self.hsv)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+
+    def _threshold(self):
+        cv2.threshold(self.gray, GRAY_THRESHOLD, 255, cv2.THRESH_BINARY, dst=self.gray)
+
+    def _mask(self):
+        (lower_red1, upper_red1), (lower_red2, upper_red2) = RED_RANGES
+        cv2.inRange(self.hsv, lower_red1, upper_red1, dst=self.mask_low)
+        cv2.inRange(self.hsv, lower_red2, upper_red2, dst=self.mask_high)
+        cv2.bitwise_or(self.mask_low, self.mask_high, dst=self.mask_low)
+        cv2.bitwise_and(self.mask_low, self.gray, dst=self.binary)
@@ -0,0 +1,70 @@
+import time
+from collections import deque
+import numpy as np
+
+
+class _NullStage():
+    """关闭统计时使用的空计时器"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage():
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageProfiler():
+    """流水线分阶段计时，每个阶段保留最近 window 次耗时，给出滚动分位数
+
+    用法: with profiler.stage("detect"): ...
+    关闭时 stage() 返回共享的空计时器，不计时也不分配对象。
+    """
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, enabled=True, window=200):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+
+    def stage(self, name):
+        return _Stage(self, name) if self.enabled else NULL_STAGE
+
+    def add(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def reset(self):
+        self.samples.clear()
+
+    def summary(self):
+        """返回 {阶段: (次数, p50, p90, p99)}，耗时单位 ms，按记录顺序排列"""
+        result = {}
+        for name, samples in list(self.samples.items()):
+            if samples:
+                values = np.percentile(np.fromiter(samples, dtype=np.float64), self.PERCENTILES) * 1000
+                result[name] = (len(samples), *values)
+        return result
+
+    def format(self, separator="\n"):
+        return separator.join(f"{name}: {p50:.1f}/{p90:.1f}/{p99:.1f} ms ({count})"
+                              for name, (count, p50, p90, p99) in self.summary().items())
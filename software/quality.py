@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+
+
+class FrameQualityGate():
+    """识别前的画面质量检查：模糊、反光、曝光
+
+    已跟踪通道框时逐个通道区域（外扩 margin 倍字高）计算拉普拉斯方差（清晰度）、
+    饱和像素比例（反光）和平均亮度（曝光），取各通道的中位数，即过半通道不合格才判定；
+    否则在显示区域或整帧上计算。通道区域用 INTER_AREA 按整数倍缩小到约 channel_height 高，
+    清晰度基本不随分辨率、字高变化；整帧或显示区域宽于 max_width 时同样用 INTER_AREA 缩小，
+    避免隔行采样的混叠抬高清晰度。
+
+    默认阈值只是量级参考，与工位光照、镜头和字高有关。启用前应在工位上采集一段读数
+    正常的画面，运行 benchmark.py quality --frames <目录> --station station.json，
+    按实测分布写入工位配置的 quality_gate 项，读数器启用质量检查时从中读取阈值。
+    """
+
+    REASONS = ("blur", "glare", "dark", "bright")
+
+    def __init__(self, min_sharpness=10.0, max_saturated=0.1, min_mean=5.0, max_mean=200.0,
+                 saturation_level=250, max_width=320, margin=0.25,
+                 channel_height=48):
+        self.min_sharpness = min_sharpness
+        self.max_saturated = max_saturated
+        self.min_mean = min_mean
+        self.max_mean = max_mean
+        self.saturation_level = saturation_level
+        self.max_width = max_width
+        self.margin = margin
+        self.channel_height = channel_height
+        self.checked = 0
+        self.rejected = dict.fromkeys(self.REASONS, 0)
+
+    def channel_rects(self, shape, boxes):
+        """通道四点框 -> 外扩后的 (x, y, w, h)，裁到画面内"""
+        rects = []
+        for box in boxes:
+            if box is None:
+                continue
+            x, y, w, h = cv2.boundingRect(np.asarray(box, dtype=np.float32))
+            pad = int(h * self.margin)
+            x0, y0 = max(0, x - pad), max(0, y - pad)
+            x1, y1 = min(shape[1], x + w + pad), min(shape[0], y + h + pad)
+            if x1 - x0 >= 3 and y1 - y0 >= 3:
+                rects.append((x0, y0, x1 - x0, y1 - y0))
+        return rects
+
+    def measure_region(self, frame, rect=None, height=None):
+        """单个区域的 (清晰度, 饱和像素比例, 平均亮度)，height 为缩小后的目标高度"""
+        if rect is not None:
+            x, y, w, h = rect
+            frame = frame[y:y + h, x:x + w]
+        # 整数倍缩小，INTER_AREA 走按块平均的快速路径
+        factor = -(-frame.shape[1] // self.max_width)
+        if height is not None:
+            factor = max(factor, frame.shape[0] // height)
+        if factor > 1:
+            frame = cv2.resize(frame, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        _, std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+        saturated = cv2.countNonZero(cv2.compare(gray, self.saturation_level, cv2.CMP_GE)) / gray.size
+        return float(std[0, 0]) ** 2, saturated, cv2.mean(gray)[0]
+
+    def measure(self, frame, rect=None, boxes=None):
+        """返回 (清晰度, 饱和像素比例, 平均亮度)；给出通道框时为各通道的中位数"""
+        rects = self.channel_rects(frame.shape, boxes) if boxes is not None else []
+        if not rects:
+            return self.measure_region(frame, rect)
+        values = np.array([self.measure_region(frame, r, self.channel_height) for r in rects])
+        sharpness, saturated, mean = np.median(values, axis=0)
+        return float(sharpness), float(saturated), float(mean)
+
+    def check(self, frame, rect=None, boxes=None):
+        """合格返回 None，否则返回原因并计数；第二个返回值为清晰度"""
+        sharpness, saturated, mean = self.measure(frame, rect, boxes)
+        self.checked += 1
+        if mean < self.min_mean:
+            reason = "dark"
+        elif mean > self.max_mean:
+            reason = "bright"
+        elif saturated > self.max_saturated:
+            reason = "glare"
+        elif sharpness < self.min_sharpness:
+            reason = "blur"
+        else:
+            return None, sharpness
+        self.rejected[reason] += 1
+        return reason, sharpness
+
+    def stats(self):
+        return {"checked": self.checked, **self.rejected}
+
+
+def suggest_thresholds(measurements, margin=0.5):
+    """由读数正常的帧的测量值 [(清晰度, 饱和像素比例, 平均亮度)] 给出阈值
+
+    清晰度和亮度下限取 5% 分位数的 margin 倍，饱和比例上限取 95% 分位数的两倍（至少 0.02），
+    亮度上限取 95% 分位数与 255 的中点，正常画面几乎不会被拒绝，只拦下明显退化的帧。
+    """
+    sharpness, saturated, mean = np.asarray(measurements, dtype=np.float64).reshape(-1, 3).T
+    high = float(np.percentile(mean, 95))
+    return {"min_sharpness": round(float(np.percentile(sharpness, 5)) * margin, 1),
+            "max_saturated": round(max(float(np.percentile(saturated, 95)) * 2, 0.02), 3),
+            "min_mean": round(float(np.percentile(mean, 5)) * margin, 1),
+            "max_mean": round((high + 255) / 2, 1)}
@@ -0,0 +1,77 @@
+import re
+
+
+# 分隔符直接删除，小数点位置由读数格式决定
+SEPARATORS = b",. "
+# OCR 常见的形近字母 -> 数字（在 ASCII 字节上做 256 项查表，比逐个 str.replace 快）
+SUBSTITUTABLE = b"oOQDlIiLJzZsSGtTBq"
+SUBSTITUTIONS = bytes.maketrans(SUBSTITUTABLE, b"000011111225567789")
+DIGITS_PATTERN = re.compile(rb"-?\d+")
+# 每做一次字母替换，置信度乘以该系数
+SUBSTITUTION_PENALTY = 0.8
+# 未指定格式时按数字位数猜测小数位（与原先的规则一致）
+DEFAULT_DECIMALS = {3: 2, 4: 2}
+
+
+class ReadingParser():
+    """把识别文本解析为 (读数, 置信度)
+
+    formats 为每个通道的 (数字位数, 小数位数)，也可给出一个元组用于所有通道；
+    指定格式的通道位数不符时直接判为无效。
+    """
+
+    def __init__(self, formats=None, channel_num=4):
+        if formats and isinstance(formats[0], int):
+            formats = [tuple(formats)] * channel_num
+        self.formats = list(formats) if formats else [None] * channel_num
+
+    def normalize(self, text):
+        """去除分隔符并把形近字母换成数字，返回 (数字串, 替换次数)；含非 ASCII 字符时返回 (None, 0)"""
+        try:
+            cleaned = text.encode('ascii').translate(None, SEPARATORS)
+        except UnicodeEncodeError:
+            return None, 0
+        if cleaned.isdigit():
+            return cleaned, 0
+        substitutions = len(cleaned) - len(cleaned.translate(None, SUBSTITUTABLE))
+        return cleaned.translate(SUBSTITUTIONS), substitutions
+
+    def parse(self, text, score=1.0, channel=None):
+        """返回 (读数, 置信度)，无法解析时返回 None"""
+        digits, substitutions = self.normalize(text)
+        if digits is None or not DIGITS_PATTERN.fullmatch(digits):
+            return None
+        negative = digits.startswith(b'-')
+        body = digits.lstrip(b'-')
+        fmt = self.formats[channel] if channel is not None else None
+        if fmt:
+            width, decimals = fmt
+            if len(body) != width:
+                return None
+        else:
+            decimals = DEFAULT_DECIMALS.get(len(body), 0)
+        value = int(body) / 10 ** decimals
+        return (-value if negative else value), score * SUBSTITUTION_PENALTY ** substitutions
+
+
+REFERENCE_FLOAT_PATTERN = re.compile(r'^-?\d+\.?\d*$')
+
+
+def reference_parse_reading(text):
+    """原始解析实现（链式 str.replace），作为基准保留"""
+    text = text.replace(',', '').replace('.', '').replace(" ","")
+    text = text.replace('o', '0').replace('O', '0').replace('Q', '0').replace('D', '0') 
+    text = text.replace('l', '1').replace('I', '1').replace('i', '1').replace('L', '1').replace('J', '1')
+    text = text.replace('z', '2').replace('Z', '2')
+    text = text.replace('s', '5').replace('S', '5')
+    text = text.replace('G', '6')
+    text = text.replace('t', '7').replace('T', '7')
+    text = text.replace('B', '8')
+    text = text.replace('q', '9')
+    if len(text) == 3:
+        text = text[0] + '.' + text[1:]
+    elif len(text) == 4:
+        text = text[:2] + '.' + text[2:]
+    if REFERENCE_FLOAT_PATTERN.match(text):
+        return float(text)
+    return None
@@ -0,0 +1,127 @@
+import math
+import cv2
+import numpy as np
+
+
+NUMERIC_CHARS = "0123456789.-"
+
+
+def load_dict(path):
+    """读取识别字典，每行一个字符"""
+    with open(path, 'rb') as f:
+        return [line.decode('utf-8').rstrip('\r\n') for line in f]
+
+
+def load_numeric_chars(path):
+    """数码管显示字符表中的数字、小数点和负号"""
+    return "".join(char for char in load_dict(path) if char in NUMERIC_CHARS)
+
+
+class CTCDecoder():
+    """CTC 贪心解码，可把输出限制在给定字符集内
+
+    限制字符集时只在允许的列上取最大值，相当于把其余字符的 logits 置为负无穷，
+    模型权重不变。formats 为每个样本的 (数字位数, 小数位数) 先验：
+    负号只能在首位，整数格式去掉小数点，数字多于位数时去掉置信度最低的数字。
+    """
+
+    def __init__(self, dict_path, use_space_char=True, allowed=None):
+        characters = load_dict(dict_path)
+        if use_space_char:
+            characters.append(" ")
+        self.characters = ["blank"] + characters
+        if allowed is None:
+            self.columns = np.arange(len(self.characters))
+        else:
+            self.columns = np.array([0] + [i for i, char in enumerate(self.characters)
+                                           if i > 0 and char in allowed])
+
+    def decode(self, probs, formats=None):
+        """probs 为 (N, T, C) 的 softmax 输出，返回 [(文本, 置信度)]"""
+        if probs.shape[2] != len(self.characters):
+            raise ValueError(f"模型输出 {probs.shape[2]} 类，与字典的 {len(self.characters)} 类不一致")
+        allowed = probs[:, :, self.columns]
+        best = allowed.argmax(axis=2)
+        best_probs = np.take_along_axis(allowed, best[:, :, None], axis=2)[:, :, 0]
+        indices = self.columns[best]
+
+        results = []
+        for n in range(len(indices)):
+            index = indices[n]
+            keep = index != 0
+            keep[1:] &= index[1:] != index[:-1]
+            chars = [self.characters[i] for i in index[keep]]
+            confidences = list(best_probs[n][keep])
+            if formats and formats[n]:
+                chars, confidences = self._apply_format(chars, confidences, formats[n])
+            text = "".join(chars)
+            results.append((text, float(np.mean(confidences)) if confidences else 0.0))
+        return results
+
+    def _apply_format(self, chars, confidences, fmt):
+        width, decimals = fmt
+        kept = [(i, char, conf) for i, (char, conf) in enumerate(zip(chars, confidences))
+                if not (char == '-' and i > 0) and not (char == '.' and decimals == 0)]
+        digits = sorted((conf, i) for i, char, conf in kept if char.isdigit())
+        drop = {i for _, i in digits[:max(0, len(digits) - width)]}
+        kept = [(char, conf) for i, char, conf in kept if i not in drop]
+        return [char for char, _ in kept], [conf for _, conf in kept]
+
+
+def preprocess_crops(crops, image_shape):
+    """与 PaddleOCR SVTR 预处理一致：等比缩放到模型高度，归一化到 [-1, 1]，右侧补零"""
+    channels, height, width = image_shape
+    ratios = [crop.shape[1] / crop.shape[0] for crop in crops]
+    batch_width = int(height * max(width / height, *ratios))
+    batch = np.zeros((len(crops), channels, height, batch_width), dtype=np.float32)
+    for i, (crop, ratio) in enumerate(zip(crops, ratios)):
+        resized_width = min(batch_width, int(math.ceil(height * ratio)))
+        resized = cv2.resize(crop, (resized_width, height)).astype(np.float32)
+        # 二值裁剪图为单通道，三个通道广播同一份数据
+        batch[i, :, :, :resized_width] = resized / 127.5 - 1.0
+    return batch
+
+
+def paddleocr_recognize(ocr, crops):
+    """用 PaddleOCR 识别一批三通道区域，按输入顺序返回 [(文本, 置信度)]
+
+    优先直接调用识别器（一次批量推理）；没有 text_recognizer 时走 ocr()，兼容两种返回：
+    旧版本整批一个列表，2.7 起每张图一个列表（无结果为 None）。
+    """
+    if not crops:
+        return []
+    recognizer = getattr(ocr, 'text_recognizer', None)
+    if recognizer is not None:
+        results, _ = recognizer(crops)
+    else:
+        result = ocr.ocr(crops, det=False, cls=False) or []
+        if len(result) == 1 and result[0] is not None and len(result[0]) == len(crops):
+            results = result[0]
+        else:
+            results = [entry[0] if entry else ("", 0.0) for entry in result]
+    results = [(text, float(score)) for text, score in results[:len(crops)]]
+    return results + [("", 0.0)] * (len(crops) - len(results))
+
+
+class PaddleRecognizer():
+    """直接驱动 PaddleOCR 识别模型：整批裁剪图拼成一个张量推理一次，再用 CTCDecoder 解码
+
+    backend 为 backends 中的推理后端（Paddle / ONNX Runtime / OpenVINO），只需提供
+    run(batch) 和 image_shape。
+    """
+
+    def __init__(self, backend, decoder):
+        self.backend = backend
+        self.decoder = decoder
+        self.image_shape = tuple(backend.image_shape)
+
+    def preprocess(self, crops):
+        return preprocess_crops(crops, self.image_shape)
+
+    def infer(self, batch):
+        return self.backend.run(batch)
+
+    def __call__(self, crops, formats=None):
+        if not crops:
+            return []
+        return self.decoder.decode(self.infer(self.preprocess(crops)), formats)
@@ -0,0 +1,148 @@
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+import cv2
+
+
+RECORD_MODES = ("avi", "frames")
+VIDEO_CODECS = ("MJPG", "FFV1")
+
+
+class FrameRecorder():
+    """后台编码录制
+
+    write() 只把帧放进有界队列，编码和写盘在后台线程进行，不阻塞预览/采集循环；
+    队列满时丢弃该帧并计数。avi 模式写入单个 MJPG/FFV1 视频文件，frames 模式
+    每帧写一张 JPEG（文件名带微秒时间戳和序号，不会互相覆盖）。两种模式都写
+    index.csv，记录每帧的序号、文件、帧位置和采集时间戳。
+    avi 模式先缓存 probe_frames 帧，按其采集时间戳的实测间隔确定视频帧率后再创建
+    文件；帧数不足时使用 fps。缓存帧在视频文件创建成功后才写入 index.csv 并计为已写入。
+    回放时以 index.csv 中的时间戳为准。
+    """
+
+    def __init__(self, folder, mode="frames", codec="MJPG", fps=10, queue_size=64, jpeg_quality=90,
+                 probe_frames=10):
+        if mode not in RECORD_MODES:
+            raise ValueError(f"未知的录制模式: {mode}")
+        if mode == "avi" and codec not in VIDEO_CODECS:
+            raise ValueError(f"未知的视频编码: {codec}")
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.mode = mode
+        self.codec = codec
+        self.fps = fps
+        self.probe_frames = max(2, probe_frames)
+        self.pending = []  # 视频文件创建前缓存的 (帧, 采集时间戳, index 行)
+        self.positions = 0  # 已进入视频的帧数
+        self.jpeg_quality = jpeg_quality
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.writer = None
+        self.video_path = os.path.join(folder, "video.avi")
+        self.index_file = open(os.path.join(folder, "index.csv"), 'w', newline='', encoding='utf-8')
+        self.index = csv.writer(self.index_file)
+        self.index.writerow(["sequence", "file", "position", "timestamp", "monotonic"])
+        self.sequence = 0  # 已提交的帧数
+        self.written = 0
+        self.dropped = 0  # 队列满被丢弃的帧
+        self.failed = 0  # 编码或写盘失败的帧
+        self.encode_time = 0.0
+        self.error = None
+        self.thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.thread.start()
+
+    def write(self, frame, timestamp=None):
+        """提交一帧，队列已满时丢弃并返回 False；帧在编码前不能被修改"""
+        self.sequence += 1
+        item = (self.sequence, frame, datetime.now(), timestamp or time.monotonic())
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _encode_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            sequence, frame, wall_time, monotonic = item
+            start = time.perf_counter()
+            try:
+                rows = self._encode(sequence, frame, wall_time, monotonic)
+            except Exception as e:
+                # 写盘失败后不再编码，后续帧全部计为写入失败；未能写入视频的缓存帧一并计入
+                self.error = str(e)
+                self.failed += max(1, len(self.pending))
+                self.pending = []
+                continue
+            self.encode_time += time.perf_counter() - start
+            self._write_index(rows)
+
+    def _write_index(self, rows):
+        self.index.writerows(rows)
+        self.written += len(rows)
+
+    def _encode(self, sequence, frame, wall_time, monotonic):
+        """编码一帧，返回已真正写入的帧对应的 index 行（avi 模式缓存期间为空）"""
+        if self.error:
+            raise RuntimeError(self.error)
+        if self.mode == "frames":
+            file = f"{wall_time.strftime('%Y%m%d_%H%M%S_%f')}_{sequence:06d}.jpg"
+            if not cv2.imwrite(os.path.join(self.folder, file), frame,
+                               [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]):
+                raise RuntimeError(f"无法写入 {file}")
+            return [[sequence, file, 0, wall_time.isoformat(), f"{monotonic:.6f}"]]
+        row = [sequence, os.path.basename(self.video_path), self.positions, wall_time.isoformat(),
+               f"{monotonic:.6f}"]
+        self.positions += 1
+        if self.writer is None:
+            self.pending.append((frame, monotonic, row))
+            if len(self.pending) >= self.probe_frames:
+                return self._open_video()
+            return []
+        self.writer.write(frame)
+        return [row]
+
+    def _open_video(self):
+        """按缓存帧的实测间隔确定帧率，创建视频文件并写入缓存帧，返回这些帧的 index 行
+
+        创建失败时缓存帧保留在 pending 中，由调用方计为写入失败。
+        """
+        pending = self.pending
+        span = pending[-1][1] - pending[0][1]
+        fps = round((len(pending) - 1) / span, 3) if len(pending) >= 2 and span > 0 else self.fps
+        height, width = pending[0][0].shape[:2]
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*self.codec), fps,
+                                 (width, height), pending[0][0].ndim == 3)
+        if not writer.isOpened():
+            raise RuntimeError(f"无法创建视频文件 {self.video_path}（编码 {self.codec}）")
+        self.writer, self.fps, self.pending = writer, fps, []
+        for frame, _, _ in pending:
+            writer.write(frame)
+        return [row for _, _, row in pending]
+
+    def stats(self):
+        return {"submitted": self.sequence, "written": self.written, "dropped": self.dropped, "fps": self.fps,
+                "failed": self.failed, "queued": self.queue.qsize(),
+                "encode_ms": round(self.encode_time * 1000 / self.written, 2) if self.written else 0.0}
+
+    def close(self):
+        """写完队列中剩余的帧后关闭文件，返回统计"""
+        self.queue.put(None)
+        self.thread.join()
+        if self.pending and not self.error:
+            # 帧数不足 probe_frames 时按已缓存的帧测算帧率
+            try:
+                self._write_index(self._open_video())
+            except Exception as e:
+                self.error = str(e)
+                self.failed += len(self.pending)
+                self.pending = []
+        if self.writer is not None:
+            self.writer.release()
+        self.index_file.close()
+        return self.stats()
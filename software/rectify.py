@@ -0,0 +1,92 @@
+import cv2
+import numpy as np
+from station import STATION_FILE, load_station_config, update_station_config
+
+
+def order_quad(points):
+    """四个角点排成左上、右上、右下、左下"""
+    points = np.asarray(points, dtype=np.float32).reshape(4, 2)
+    sums = points.sum(axis=1)
+    diffs = points[:, 1] - points[:, 0]
+    return np.float32([points[np.argmin(sums)], points[np.argmin(diffs)],
+                       points[np.argmax(sums)], points[np.argmax(diffs)]])
+
+
+def find_panel_quad(frame, binary=None, min_area=0.1, margin=0.05):
+    """查找面板四边形（左上、右上、右下、左下）
+
+    优先取边缘图中面积最大的凸四边形轮廓（不小于画面的 min_area）；找不到时，
+    若给出数码管二值图，用全部亮像素的最小外接旋转矩形外扩 margin 代替，只能校正旋转。
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    limit = min_area * gray.shape[0] * gray.shape[1]
+    best, best_area = None, limit
+    for contour in contours:
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        area = cv2.contourArea(approx)
+        if len(approx) == 4 and cv2.isContourConvex(approx) and area >= best_area:
+            best, best_area = approx, area
+    if best is not None:
+        return order_quad(best)
+
+    if binary is None:
+        return None
+    points = cv2.findNonZero(binary)
+    if points is None:
+        return None
+    (cx, cy), (w, h), angle = cv2.minAreaRect(points)
+    pad = margin * max(w, h)
+    return order_quad(cv2.boxPoints(((cx, cy), (w + 2 * pad, h + 2 * pad), angle)))
+
+
+class PanelRectifier():
+    """面板透视校正：标定时算一次单应矩阵并预先生成 remap 映射表
+
+    每帧只需一次 cv2.remap（定点映射表），比逐帧 getPerspectiveTransform +
+    warpPerspective 省去逐像素的矩阵运算；输出为固定尺寸的正视面板图，缓冲区复用。
+    """
+
+    def __init__(self, quad, size=None):
+        self.quad = order_quad(quad)
+        tl, tr, br, bl = self.quad
+        if size is None:
+            width = int(round(max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))))
+            height = int(round(max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))))
+            size = (width, height)
+        self.size = (int(size[0]), int(size[1]))
+        width, height = self.size
+        target = np.float32([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]])
+        self.homography = cv2.getPerspectiveTransform(self.quad, target)
+
+        # 输出像素 -> 原图坐标
+        inverse = np.linalg.inv(self.homography)
+        xs, ys = np.meshgrid(np.arange(width, dtype=np.float64), np.arange(height, dtype=np.float64))
+        grid = np.stack([xs, ys, np.ones_like(xs)], axis=-1) @ inverse.T
+        map_x = (grid[..., 0] / grid[..., 2]).astype(np.float32)
+        map_y = (grid[..., 1] / grid[..., 2]).astype(np.float32)
+        self.map1, self.map2 = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+        self.output = None
+
+    def __call__(self, frame):
+        """返回校正后的面板图（复用缓冲区，下一帧会覆盖）"""
+        shape = (self.size[1], self.size[0]) + frame.shape[2:]
+        if self.output is None or self.output.shape != shape or self.output.dtype != frame.dtype:
+            self.output = np.empty(shape, dtype=frame.dtype)
+        cv2.remap(frame, self.map1, self.map2, cv2.INTER_LINEAR, dst=self.output,
+                  borderMode=cv2.BORDER_CONSTANT)
+        return self.output
+
+    def save(self, path=STATION_FILE):
+        """写入工位配置文件，保留文件中的其它配置项"""
+        update_station_config(path, "rectify", {"quad": self.quad.tolist(), "size": list(self.size)})
+
+    @classmethod
+    def load(cls, path=STATION_FILE):
+        """读取工位的校正参数，未标定时返回 None"""
+        config = load_station_config(path).get("rectify")
+        if not config:
+            return None
+        return cls(config["quad"], config["size"])
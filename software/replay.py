@@ -0,0 +1,139 @@
+import csv
+import os
+import time
+import cv2
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+# FrameRecorder 的 avi 模式在录制目录中写入的视频文件
+RECORDED_VIDEO = "video.avi"
+
+
+def load_index(folder):
+    """读取 FrameRecorder 的 index.csv，返回 [(文件, 帧位置, 采集单调时钟)]；没有时返回空列表"""
+    path = os.path.join(folder, "index.csv")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return [(row["file"], int(row["position"]), float(row["monotonic"])) for row in csv.DictReader(f)]
+
+
+class ReplaySource():
+    """回放帧源：按顺序播放 captures/<时间戳>/ 图片目录或视频文件
+
+    接口与 CameraCapture 相同，可直接交给 FrameBroker / CurrentMeterReader。
+    pacing 为 "realtime" 时按录制帧率出帧；为 "fast" 时尽快出帧，并让 FrameBroker
+    逐帧等待订阅者取走（lockstep），保证每帧都被处理、结果可复现。
+    录制目录中只有 video.avi 时播放该视频；有 index.csv 时按其中的采集时间戳出帧，
+    否则图片目录按 fps 计算（camera.py 默认每 0.1 秒存一张）。
+    """
+
+    def __init__(self, path, pacing="realtime", loop=False, fps=10):
+        if pacing not in ("realtime", "fast"):
+            raise ValueError(f"未知的回放节奏: {pacing}")
+        self.path = path
+        self.pacing = pacing
+        self.lockstep = pacing == "fast"
+        self.loop = loop
+        # 帧序号 -> 相对第一帧的采集时间，来自 index.csv
+        self.times = None
+        if os.path.isdir(path):
+            self.files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(IMAGE_EXTENSIONS))
+            index = load_index(path)
+            if not self.files and os.path.exists(os.path.join(path, RECORDED_VIDEO)):
+                # avi 模式的录制目录：按帧位置取时间戳
+                self.files = None
+                path = os.path.join(path, RECORDED_VIDEO)
+                times = {position: monotonic for file, position, monotonic in index if file == RECORDED_VIDEO}
+                if times:
+                    self.times = [times.get(position) for position in range(max(times) + 1)]
+            elif self.files:
+                times = {file: monotonic for file, _, monotonic in index}
+                if times:
+                    self.times = [times.get(os.path.basename(file)) for file in self.files]
+            else:
+                raise RuntimeError(f"目录中没有图片: {path}")
+            if self.times is not None and (None in self.times or not self.times):
+                self.times = None  # 与文件对不上时退回按帧率计算
+            elif self.times is not None:
+                self.times = [t - self.times[0] for t in self.times]
+        if self.files is not None:
+            self.video = None
+            self.fps = fps
+        else:
+            self.files = None
+            self.video = cv2.VideoCapture(path)
+            if not self.video.isOpened():
+                raise RuntimeError(f"无法打开视频: {path}")
+            self.fps = self.video.get(cv2.CAP_PROP_FPS) or fps
+        self.index = 0  # 当前轮播放到的帧
+        self.delivered = 0
+        self.unreadable = 0  # 无法解码而跳过的图片
+        self.running = True
+        self.start = time.monotonic()
+
+    def _next(self):
+        """读取下一帧，返回 (帧, 录制时间秒)；到结尾返回 (None, 0.0)"""
+        if self.files is not None:
+            # 中断采集时最后一张可能没写完，读不出的图片跳过，只有播放到最后一个文件才结束
+            while self.index < len(self.files):
+                frame = cv2.imread(self.files[self.index])
+                if frame is not None:
+                    break
+                print(f"[WARN] 无法读取图片，已跳过: {self.files[self.index]}")
+                self.unreadable += 1
+                self.index += 1
+            else:
+                return None, 0.0
+            media_time = self.index / self.fps
+        else:
+            media_time = self.video.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            ok, frame = self.video.read()
+            if not ok:
+                return None, 0.0
+        if self.times is not None and self.index < len(self.times):
+            media_time = self.times[self.index]
+        self.index += 1
+        return frame, media_time
+
+    def _rewind(self):
+        self.index = 0
+        if self.video is not None:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.start = time.monotonic()
+
+    def read_frame(self, timeout=1.0):
+        """返回 (帧, 时间戳)，时间戳为回放起点加录制时间；播放结束返回 (None, 0.0)"""
+        if not self.running:
+            return None, 0.0
+        frame, media_time = self._next()
+        if frame is None and self.loop and self.index > 0:
+            self._rewind()
+            frame, media_time = self._next()
+        if frame is None:
+            self.running = False
+            return None, 0.0
+        timestamp = self.start + media_time
+        if self.pacing == "realtime":
+            delay = timestamp - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.delivered += 1
+        return frame, timestamp
+
+    def read(self):
+        """兼容 cv2.VideoCapture.read()"""
+        frame, _ = self.read_frame()
+        return frame is not None, frame
+
+    def stats(self):
+        return {"fps": self.fps, "delivered": self.delivered, "dropped": 0, "unreadable": self.unreadable}
+
+    def isOpened(self):
+        return self.running
+
+    def release(self):
+        self.running = False
+        if self.video is not None:
+            self.video.release()
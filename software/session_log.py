@@ -0,0 +1,156 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+# 旧日志消息的 [标签] 前缀 -> 级别
+TAG_LEVELS = {"DEBUG": "DEBUG", "INFO": "INFO", "PROFILE": "INFO", "WARNING": "WARNING", "ERROR": "ERROR",
+              "EXCEPTION": "ERROR"}
+TAG_PATTERN = re.compile(r"\[([A-Z]+)\]\s*")
+
+
+class SessionLogger():
+    """会话日志：调用方只把记录放入队列，后台线程批量写文件
+
+    每条记录为一行 JSON（单调时钟 ts、系统时间 time、级别、来源、消息及附加字段），
+    文件在整个会话中保持打开，队列取空时才 flush；超过 max_bytes 时按 .1 ... .backups 轮转。
+    低于 level 的记录在入队前丢弃；热路径上的 DEBUG 日志应先判断 debug_enabled，
+    关闭时连消息字符串都不必拼接。队列满时丢弃记录并计数，不阻塞调用方。
+    设置文件路径之前的记录（预热、后端选择等）暂存在内存中，第一次 set_path 时写入该文件。
+    """
+
+    def __init__(self, path=None, level="INFO", max_bytes=10 * 1024 * 1024, backups=5, queue_size=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.set_level(level)
+        self.file = None
+        self.file_path = None
+        self.early = deque()  # 尚未设置路径时的记录，只在写入线程中访问
+        self.early_size = queue_size
+        # 系统时间在写入线程里由单调时钟换算，调用方只取一次 monotonic()
+        self.wall_offset = time.time() - time.monotonic()
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+
+    def set_level(self, level):
+        self.level = LEVELS[level]
+        self.debug_enabled = self.level <= LEVELS["DEBUG"]
+
+    def set_path(self, path):
+        """切换会话日志文件，之前入队的记录仍写入原文件；暂存的早期记录写入第一个设置的文件"""
+        self.path = path
+        if path is not None:
+            self._put((path, None))
+
+    def enabled(self, level):
+        return LEVELS[level] >= self.level
+
+    def log(self, level, message, source=None, **fields):
+        if LEVELS[level] < self.level:
+            return
+        record = {"ts": time.monotonic(), "level": level, "source": source, "msg": message}
+        record.update(fields)
+        self._put((self.path, record))
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def tagged(self, text, source=None, **fields):
+        """按消息开头的 [DEBUG]/[ERROR] 等标签确定级别，无标签为 INFO"""
+        match = TAG_PATTERN.match(text)
+        level = TAG_LEVELS.get(match.group(1)) if match else None
+        if level is None:
+            self.log("INFO", text, source, **fields)
+        else:
+            self.log(level, text[match.end():], source, tag=match.group(1), **fields)
+
+    def debug(self, message, source=None, **fields):
+        self.log("DEBUG", message, source, **fields)
+
+    def info(self, message, source=None, **fields):
+        self.log("INFO", message, source, **fields)
+
+    def warning(self, message, source=None, **fields):
+        self.log("WARNING", message, source, **fields)
+
+    def error(self, message, source=None, **fields):
+        self.log("ERROR", message, source, **fields)
+
+    def _write_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+                # 取空队列后再 flush，突发的多条日志合并为一次写入
+                if self.queue.empty() and self.file is not None:
+                    self.file.flush()
+            except Exception as e:
+                print(f"无法写入日志: {str(e)}")
+            finally:
+                self.queue.task_done()
+        if self.file is not None:
+            self.file.close()
+
+    def _write(self, path, record):
+        if path is None:
+            if len(self.early) >= self.early_size:
+                self.early.popleft()
+                self.dropped += 1
+            self.early.append(record)
+            return
+        if record is None:
+            # set_path 的标记：把暂存的早期记录写入新文件
+            while self.early:
+                self._write(path, self.early.popleft())
+            return
+        if path != self.file_path:
+            if self.file is not None:
+                self.file.close()
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.file = open(path, 'a', encoding='utf-8')
+            self.file_path = path
+        timestamp = record["ts"]
+        record["ts"] = round(timestamp, 6)
+        record["time"] = datetime.fromtimestamp(timestamp + self.wall_offset).isoformat(timespec="milliseconds")
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        if self.file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self.file.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.file_path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.file_path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.file_path, f"{self.file_path}.1")
+        else:
+            os.remove(self.file_path)
+        self.file = open(self.file_path, 'a', encoding='utf-8')
+
+    def flush(self):
+        """等待已入队的记录全部写入文件"""
+        self.queue.join()
+
+    def close(self, timeout=2.0):
+        """写完已入队的记录后关闭文件；队列一直满时最多等待 timeout 秒，不会卡住退出"""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            print(f"日志队列已满，{self.queue.qsize()} 条记录未写入")
+            return
+        self.thread.join(timeout=timeout)
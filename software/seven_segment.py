@@ -0,0 +1,200 @@
+import cv2
+import numpy as np
+
+
+# 段位编号: a 上, b 右上, c 右下, d 下, e 左下, f 左上, g 中
+SEGMENTS = "abcdefg"
+
+# 各段采样窗口，相对数字框的 (x0, y0, x1, y1)
+# 横段取窗口内填充率最高的一行，竖段取填充率最高的一列，与笔画粗细无关
+SEGMENT_REGIONS = {
+    "a": (0.25, 0.00, 0.75, 0.25),
+    "b": (0.65, 0.12, 1.00, 0.38),
+    "c": (0.65, 0.62, 1.00, 0.88),
+    "d": (0.25, 0.75, 0.75, 1.00),
+    "e": (0.00, 0.62, 0.35, 0.88),
+    "f": (0.00, 0.12, 0.35, 0.38),
+    "g": (0.25, 0.375, 0.75, 0.625),
+}
+HORIZONTAL_SEGMENTS = "adg"
+# 上下两个段间空洞，任何字符都不应点亮，用于排除整块红色干扰
+HOLE_REGIONS = (
+    (0.40, 0.24, 0.60, 0.34),
+    (0.40, 0.66, 0.60, 0.76),
+)
+
+# 点亮的段 -> 字符，含 6/7/9 的常见变体
+SEGMENT_PATTERNS = {
+    "abcdef": "0",
+    "bc": "1",
+    "abdeg": "2",
+    "abcdg": "3",
+    "bcfg": "4",
+    "acdfg": "5",
+    "acdefg": "6",
+    "cdefg": "6",
+    "abc": "7",
+    "abcf": "7",
+    "abcdefg": "8",
+    "abcdfg": "9",
+    "abcfg": "9",
+    "g": "-",
+}
+
+
+def _pattern_bits(segments):
+    bits = 0
+    for segment in segments:
+        bits |= 1 << SEGMENTS.index(segment)
+    return bits
+
+
+SEGMENT_TABLE = {_pattern_bits(segments): char for segments, char in SEGMENT_PATTERNS.items()}
+
+
+def _runs(flags, max_gap=0):
+    """一维布尔序列中的连续区间 [(起, 止)]，合并不超过 max_gap 的间隙"""
+    padded = np.concatenate(([0], flags.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    runs = []
+    for start, stop in zip(edges[::2], edges[1::2]):
+        if runs and start - runs[-1][1] <= max_gap:
+            runs[-1] = (runs[-1][0], stop)
+        else:
+            runs.append((start, stop))
+    return runs
+
+
+class SevenSegmentDecoder():
+    """红色七段数码管二值裁剪图解码：分割数字、采样七段和小数点、查表"""
+
+    def __init__(self, min_confidence=0.5, on_ratio=0.5, slant=0.0):
+        self.min_confidence = min_confidence  # 低于此置信度交给 PaddleOCR
+        self.on_ratio = on_ratio  # 采样行/列的前景占比超过该值视为点亮
+        self.slant = slant  # 斜体数码管的倾斜量 (dx/dy)，解码前先校正
+        self.decoded = 0
+        self.fallback = 0
+
+    def read(self, crop):
+        """可信时返回 (文本, 置信度)，否则返回 None 并计入回退次数"""
+        text, confidences = self.decode(crop)
+        if text and min(confidences) >= self.min_confidence:
+            self.decoded += 1
+            return text, min(confidences)
+        self.fallback += 1
+        return None
+
+    def decode(self, crop):
+        """返回 (文本, 每个字符的置信度)，无法分割时返回 ("", [])"""
+        binary = crop > 0
+        if self.slant:
+            binary = self._deskew(binary)
+
+        bands = _runs(binary.any(axis=1), max_gap=2)
+        if not bands:
+            return "", []
+        top, bottom = max(bands, key=lambda band: band[1] - band[0])
+        height = bottom - top
+        if height < 7:
+            return "", []
+        digit_rows = binary[top:bottom]
+        columns = _runs(digit_rows.any(axis=0), max_gap=max(1, int(height * 0.06)))
+
+        widths = [stop - start for start, stop in columns if stop - start > 0.4 * height]
+        digit_width = int(np.median(widths)) if widths else int(height * 0.5)
+
+        text = []
+        confidences = []
+        for start, stop in columns:
+            rows = np.flatnonzero(digit_rows[:, start:stop].any(axis=1))
+            width = stop - start
+            if width < 0.4 * digit_width and rows[0] > 0.7 * height:
+                text.append(".")
+                confidences.append(1.0)
+                continue
+            digit = digit_rows[:, start:stop]
+            if width < 0.6 * digit_width and rows[0] < 0.4 * height:
+                # "1" 与 "-" 之外的窄区间按标准宽度右对齐补齐，首位的 "1" 左侧不足时补零
+                pad = max(0, digit_width - stop)
+                digit = digit_rows[:, max(0, stop - digit_width):stop]
+                if pad:
+                    digit = np.pad(digit, ((0, 0), (pad, 0)))
+            char, confidence = self._decode_digit(digit)
+            text.append(char)
+            confidences.append(confidence)
+        return "".join(text), confidences
+
+    def _decode_digit(self, digit):
+        """采样七段并查表，置信度取各段判定裕量的最小值"""
+        height, width = digit.shape
+
+        def window(region):
+            fx0, fy0, fx1, fy1 = region
+            x0, y0 = int(fx0 * width), int(fy0 * height)
+            x1 = max(int(round(fx1 * width)), x0 + 1)
+            y1 = max(int(round(fy1 * height)), y0 + 1)
+            return digit[y0:y1, x0:x1]
+
+        confidence = 1.0
+        for region in HOLE_REGIONS:
+            ratio = window(region).mean()
+            if ratio > self.on_ratio:
+                return "?", 0.0
+            confidence = min(confidence, (self.on_ratio - ratio) / self.on_ratio)
+
+        bits = 0
+        for index, segment in enumerate(SEGMENTS):
+            axis = 1 if segment in HORIZONTAL_SEGMENTS else 0
+            ratio = window(SEGMENT_REGIONS[segment]).mean(axis=axis).max()
+            if ratio > self.on_ratio:
+                bits |= 1 << index
+                margin = (ratio - self.on_ratio) / (1 - self.on_ratio)
+            else:
+                margin = (self.on_ratio - ratio) / self.on_ratio
+            confidence = min(confidence, margin)
+        char = SEGMENT_TABLE.get(bits)
+        if char is None:
+            return "?", 0.0
+        return char, float(confidence)
+
+    def _deskew(self, binary):
+        height, width = binary.shape
+        matrix = np.float32([[1, self.slant, -self.slant * height], [0, 1, 0]])
+        return cv2.warpAffine(binary.view(np.uint8), matrix, (width, height),
+                              flags=cv2.INTER_NEAREST) > 0
+
+
+def render_digits(text, height=48, thickness=None, gap=None):
+    """把数字文本画成七段数码管二值图（255 为点亮），用于测试和基准"""
+    thickness = thickness or max(2, height // 8)
+    gap = gap or max(2, height // 5)
+    digit_width = height // 2
+    widths = [thickness if char == "." else digit_width for char in text]
+    image = np.zeros((height + 4, sum(widths) + gap * (len(text) + 1)), dtype=np.uint8)
+    pattern_by_char = {}
+    for segments, char in SEGMENT_PATTERNS.items():
+        pattern_by_char.setdefault(char, segments)
+    half = height // 2
+    bars = {
+        "a": (0, 0, digit_width, thickness),
+        "b": (digit_width - thickness, 0, digit_width, half),
+        "c": (digit_width - thickness, half, digit_width, height),
+        "d": (0, height - thickness, digit_width, height),
+        "e": (0, half, thickness, height),
+        "f": (0, 0, thickness, half),
+        "g": (0, half - thickness // 2, digit_width, half + (thickness + 1) // 2),
+    }
+    x = gap
+    for char, width in zip(text, widths):
+        if char == ".":
+            image[2 + height - thickness:2 + height, x:x + thickness] = 255
+        else:
+            for segment in pattern_by_char[char]:
+                bx0, by0, bx1, by1 = bars[segment]
+                # 段与段之间沿长度方向留 1 像素缝隙，接近真实数码管
+                if segment in HORIZONTAL_SEGMENTS:
+                    image[2 + by0:2 + by1, x + bx0 + 1:x + bx1 - 1] = 255
+                else:
+                    image[2 + by0 + 1:2 + by1 - 1, x + bx0:x + bx1] = 255
+        x += width + gap
+    return image
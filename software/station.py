@@ -0,0 +1,22 @@
+import json
+import os
+
+
+# 工位配置文件：透视校正、识别模型变体等随工位而定的参数
+STATION_FILE = "station.json"
+
+
+def load_station_config(path=STATION_FILE):
+    """读取工位配置，文件不存在时返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def update_station_config(path, key, value):
+    """写入一项工位配置，保留文件中的其它配置项"""
+    config = load_station_config(path)
+    config[key] = value
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
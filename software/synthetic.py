@@ -0,0 +1,150 @@
+import csv
+import os
+import time
+import cv2
+import numpy as np
+from seven_segment import render_digits
+
+
+def format_value(value, fmt):
+    """按 (数字位数, 小数位数) 把读数格式化为显示文本"""
+    width, decimals = fmt
+    return f"{value:.{decimals}f}" if decimals else f"{int(round(value))}"
+
+
+def meter_grid(meters):
+    """1-16 个表排成的 (行数, 列数)，尽量接近横向画面的比例"""
+    if not 1 <= meters <= 16:
+        raise ValueError(f"表的数量应为 1-16: {meters}")
+    cols = int(np.ceil(np.sqrt(meters * 4 / 3)))
+    rows = int(np.ceil(meters / cols))
+    return rows, cols
+
+
+class SyntheticMeters():
+    """红色七段数码管读数的合成画面生成器，每帧附带真值
+
+    meters 个表按行优先排成网格，读数按 fmt 格式随机游走（每 hold 帧变化一次，便于按批
+    对照真值）。画面退化：blur 为高斯模糊 sigma，noise 为噪声标准差，glare 为反光光斑
+    强度（0-1），perspective 为角点随机偏移占画面的比例，exposure 为亮度增益。
+    """
+
+    def __init__(self, meters=4, fmt=(4, 2), width=640, height=480, hold=1, step=0.05, blur=0.0,
+                 noise=4.0, glare=0.0, perspective=0.0, exposure=1.0, seed=0):
+        self.meters = meters
+        self.formats = [tuple(fmt)] * meters if isinstance(fmt[0], int) else [tuple(f) for f in fmt]
+        self.width = width
+        self.height = height
+        self.hold = max(1, hold)
+        self.step = step
+        self.blur = blur
+        self.noise = noise
+        self.glare = glare
+        self.perspective = perspective
+        self.exposure = exposure
+        self.rng = np.random.default_rng(seed)
+        self.limits = [10 ** (digits - decimals) - 10 ** -decimals for digits, decimals in self.formats]
+        # 从 10% 以上开始，避免首位为 0 时显示位数变少
+        self.values = np.array([self.rng.uniform(0.1, 0.9) * limit for limit in self.limits])
+        self.count = 0
+
+    def _advance(self):
+        if self.count and self.count % self.hold == 0:
+            for index, limit in enumerate(self.limits):
+                value = self.values[index] + self.rng.normal(0, self.step * limit / 10)
+                self.values[index] = float(np.clip(value, 0.1 * limit, limit))
+        self.count += 1
+        return [format_value(value, fmt) for value, fmt in zip(self.values, self.formats)]
+
+    def frame(self):
+        """返回 (BGR 帧, 真值)，真值含各表的显示文本和四点框（与通道顺序一致）"""
+        return self.render(self._advance())
+
+    def render(self, texts):
+        """按给定的显示文本绘制一帧（不推进随机游走），退化参数与 frame() 相同"""
+        rows, cols = meter_grid(len(texts))
+        cell_w, cell_h = self.width // cols, self.height // rows
+        frame = np.full((self.height, self.width, 3), 25, dtype=np.float32)
+        boxes = []
+        for index, text in enumerate(texts):
+            row, col = divmod(index, cols)
+            digit_height = max(16, int(cell_h * 0.4))
+            glyphs = render_digits(text, digit_height)
+            if glyphs.shape[1] > cell_w * 0.85:
+                # 放不下时按比例减小字高重新绘制，不缩放图像，避免笔画边缘变灰
+                glyphs = render_digits(text, max(16, int(digit_height * cell_w * 0.85 / glyphs.shape[1])))
+            h, w = glyphs.shape
+            x = col * cell_w + (cell_w - w) // 2
+            y = row * cell_h + (cell_h - h) // 2
+            lit = glyphs.astype(np.float32)[..., None] / 255
+            region = frame[y:y + h, x:x + w]
+            region[:] = region * (1 - lit) + lit * np.float32((30, 30, 230))
+            boxes.append(np.float32([[x, y], [x + w, y], [x + w, y + h], [x, y + h]]))
+
+        if self.glare > 0:
+            # 随机位置的椭圆高光，模拟面板玻璃反光
+            cx, cy = self.rng.uniform(0, self.width), self.rng.uniform(0, self.height)
+            ys, xs = np.ogrid[:self.height, :self.width]
+            radius = 0.2 * min(self.width, self.height)
+            spot = np.exp(-(((xs - cx) / (1.5 * radius)) ** 2 + ((ys - cy) / radius) ** 2))
+            frame += (self.glare * 255 * spot)[..., None]
+        frame *= self.exposure
+        if self.noise > 0:
+            frame += self.rng.normal(0, self.noise, frame.shape).astype(np.float32)
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+        if self.blur > 0:
+            frame = cv2.GaussianBlur(frame, (0, 0), self.blur)
+        if self.perspective > 0:
+            corners = np.float32([[0, 0], [self.width, 0], [self.width, self.height], [0, self.height]])
+            jitter = self.rng.uniform(-1, 1, (4, 2)) * self.perspective * np.float32([self.width, self.height])
+            matrix = cv2.getPerspectiveTransform(corners, (corners + jitter).astype(np.float32))
+            frame = cv2.warpPerspective(frame, matrix, (self.width, self.height), borderValue=(25, 25, 25))
+            boxes = [cv2.perspectiveTransform(box[None], matrix)[0] for box in boxes]
+        return frame, {"texts": texts, "boxes": boxes}
+
+    def frames(self, count):
+        return [self.frame() for _ in range(count)]
+
+
+class SyntheticSource():
+    """内存中的合成帧源，接口与 ReplaySource 相同，按 lockstep 逐帧回放"""
+
+    lockstep = True
+
+    def __init__(self, frames, fps=10):
+        self.frames = frames
+        self.fps = fps
+        self.index = 0
+        self.running = True
+        self.start = time.monotonic()
+
+    def read_frame(self, timeout=1.0):
+        if not self.running or self.index >= len(self.frames):
+            self.running = False
+            return None, 0.0
+        frame = self.frames[self.index]
+        self.index += 1
+        return frame, self.start + self.index / self.fps
+
+    def read(self):
+        frame, _ = self.read_frame()
+        return frame is not None, frame
+
+    def isOpened(self):
+        return self.running
+
+    def release(self):
+        self.running = False
+
+
+def write_dataset(path, generator, count):
+    """把合成帧写成图片目录（可用 ReplaySource 回放）和 truth.csv 真值表"""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "truth.csv"), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["file"] + [f"ch{index + 1}" for index in range(generator.meters)])
+        for index in range(count):
+            frame, truth = generator.frame()
+            file = f"{index:06d}.png"
+            cv2.imwrite(os.path.join(path, file), frame)
+            writer.writerow([file] + truth["texts"])
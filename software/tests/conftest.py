@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 各模块按平铺方式互相导入（from preprocess import ...），测试时把 software 目录加入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
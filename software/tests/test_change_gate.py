@@ -0,0 +1,55 @@
+from change_gate import ChannelChangeGate
+from seven_segment import render_digits
+
+
+def signatures(gate, texts):
+    return [gate.signature(render_digits(text)) for text in texts]
+
+
+def tracked_gate(texts, **kwargs):
+    gate = ChannelChangeGate(**kwargs)
+    gate.track([f"box{index}" for index in range(len(texts))], signatures(gate, texts),
+               [(float(text), 0.9) for text in texts])
+    return gate
+
+
+def test_reuses_reading_while_display_unchanged():
+    gate = tracked_gate(["12.34", "56.78"])
+    same = signatures(gate, ["12.34", "56.78"])
+    assert gate.lookup(0, same[0]) == (12.34, 0.9)
+    assert gate.lookup(1, same[1]) == (56.78, 0.9)
+    assert gate.stats() == {"skipped": 2, "processed": 0, "skip_ratio": 1.0}
+
+
+def test_changed_display_is_processed():
+    gate = tracked_gate(["12.34"])
+    assert gate.lookup(0, signatures(gate, ["12.35"])[0]) is None
+    assert gate.stats()["processed"] == 1
+
+
+def test_max_reuse_expires_and_update_restarts_count():
+    gate = tracked_gate(["12.34"], max_reuse=3)
+    signature = signatures(gate, ["12.34"])[0]
+    assert [gate.lookup(0, signature) for _ in range(4)] == [(12.34, 0.9)] * 3 + [None]
+    gate.update(0, signature, (12.34, 0.95))
+    assert gate.lookup(0, signature) == (12.34, 0.95)
+
+
+def test_drop_keeps_other_channels_and_relocate_restores():
+    gate = tracked_gate(["12.34", "56.78"])
+    boxes = gate.boxes
+    gate.drop(0)
+    assert gate.boxes == [None, "box1"]
+    assert boxes == ["box0", "box1"]  # 已规划的帧仍持有旧列表
+    assert gate.lookup(1, signatures(gate, ["56.78"])[0]) == (56.78, 0.9)
+    signature = signatures(gate, ["12.40"])[0]
+    gate.relocate(0, "moved", signature, (12.4, 0.9))
+    assert gate.boxes == ["moved", "box1"]
+    assert gate.lookup(0, signature) == (12.4, 0.9)
+
+
+def test_dropping_every_channel_resets():
+    gate = tracked_gate(["12.34", "56.78"])
+    gate.drop(0)
+    gate.drop(1)
+    assert gate.boxes is None and gate.readings == []
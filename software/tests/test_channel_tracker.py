@@ -0,0 +1,75 @@
+import numpy as np
+
+from channel_tracker import ChannelTracker
+from detectors import rect_to_box
+
+
+def row_boxes(xs, y=100, width=80, height=40):
+    return [rect_to_box(x, y, x + width, y + height) for x in xs]
+
+
+def test_locks_on_exact_channel_count():
+    tracker = ChannelTracker(3)
+    assigned = tracker.assign(row_boxes([0, 100, 200]))
+    assert tracker.locked
+    assert list(assigned) == [0, 1, 2]
+
+
+def test_does_not_lock_with_too_few_boxes():
+    tracker = ChannelTracker(3)
+    assert list(tracker.assign(row_boxes([0, 100]))) == [-1, -1, -1]
+    assert not tracker.locked
+
+
+def test_extra_box_locks_on_best_scores():
+    tracker = ChannelTracker(3)
+    # 第 2 个框是面板上的标签，置信度最低
+    assigned = tracker.assign(row_boxes([0, 100, 200, 300]), [0.9, 0.3, 0.95, 0.8])
+    assert list(assigned) == [0, 2, 3]
+    # 锁定后标签仍在，通道保持对应
+    assigned = tracker.assign(row_boxes([2, 102, 202, 302]), [0.9, 0.3, 0.95, 0.8])
+    assert list(assigned) == [0, 2, 3]
+
+
+def test_extra_box_without_scores_uses_height():
+    tracker = ChannelTracker(2)
+    boxes = row_boxes([0, 200]) + [rect_to_box(100, 100, 120, 110)]
+    assert list(tracker.assign(boxes)) == [0, 1]
+
+
+def test_missing_channel_does_not_shift_others():
+    tracker = ChannelTracker(3)
+    tracker.assign(row_boxes([0, 100, 200]))
+    assigned = tracker.assign(row_boxes([0, 200]))
+    assert list(assigned) == [0, -1, 1]
+    assert tracker.missed[1] == 1
+
+
+def test_locate_uses_predicted_centers():
+    tracker = ChannelTracker(3)
+    tracker.assign(row_boxes([0, 100, 200]))
+    tracker.assign(row_boxes([10, 110, 210]))  # 向右移动
+    found = tracker.locate(box_array_list(row_boxes([122, 500])), [1])
+    assert found == {1: 0}
+
+
+def test_unlocks_after_all_channels_lost():
+    tracker = ChannelTracker(2, max_missed=3)
+    tracker.assign(row_boxes([0, 100]))
+    for _ in range(4):
+        tracker.assign(row_boxes([]))
+    assert not tracker.locked
+
+
+def box_array_list(boxes):
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+
+
+def test_dropped_channel_relocates_to_same_index():
+    tracker = ChannelTracker(3)
+    tracker.assign(row_boxes([0, 100, 200]))
+    tracker.assign(row_boxes([0, 200]))  # 通道 2 被遮挡
+    found = tracker.locate(box_array_list(row_boxes([0, 104, 200])), [1])
+    assert found == {1: 1}
+    assert list(tracker.assign(row_boxes([0, 104, 200]))) == [0, 1, 2]
+    assert tracker.missed[1] == 0
@@ -0,0 +1,43 @@
+from glyph_cache import GlyphCache
+from seven_segment import render_digits
+
+
+def keys(cache, text):
+    return cache.split(render_digits(text))
+
+
+def test_split_one_key_per_glyph():
+    cache = GlyphCache()
+    split = keys(cache, "12.34")
+    assert len(split) == 5
+    assert split[0] != split[1] and split[2] != split[3]
+    assert keys(cache, "1")[0] == split[0]
+
+
+def test_hit_after_store_and_miss_on_unknown_glyph():
+    cache = GlyphCache()
+    assert cache.lookup(keys(cache, "12.34")) is None
+    assert cache.store(keys(cache, "12.34"), "12.34", 0.95)
+    assert cache.lookup(keys(cache, "43.21")) == ("43.21", 0.95)  # 同样的字形换了顺序
+    assert cache.lookup(keys(cache, "15.00")) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.stats()["hit_ratio"] == round(1 / 3, 3)
+
+
+def test_store_rejects_low_confidence_and_length_mismatch():
+    cache = GlyphCache(min_confidence=0.8)
+    assert not cache.store(keys(cache, "12.34"), "12.34", 0.5)
+    assert not cache.store(keys(cache, "12.34"), "1234", 0.95)
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = GlyphCache(max_size=3)
+    cache.store(keys(cache, "123"), "123", 0.9)
+    assert cache.lookup(keys(cache, "1")) == ("1", 0.9)  # "1" 变为最近使用
+    cache.store(keys(cache, "45"), "45", 0.9)
+    assert cache.evictions == 2
+    assert cache.lookup(keys(cache, "14")) is not None
+    assert cache.lookup(keys(cache, "2")) is None
+    assert cache.lookup(keys(cache, "3")) is None
+    assert cache.stats()["size"] == 3
@@ -0,0 +1,21 @@
+import pytest
+
+# CurrentMeterReader 在模块级导入 PaddleOCR，未安装时跳过端到端检查
+pytest.importorskip("paddleocr")
+
+from benchmark import bench_pipeline
+
+
+@pytest.mark.parametrize("meters, fmt", [(4, (4, 2)), (9, (4, 2)), (16, (3, 1))])
+def test_synthetic_pipeline_accuracy(meters, fmt):
+    result = bench_pipeline(frames=40, meters=meters, fmt=fmt, detector="component")
+    assert result["frame_exact"] >= 0.99
+    assert result["batch_exact"] >= 0.99
+
+
+def test_degraded_pipeline_accuracy():
+    degrade = {"blur": 1.0, "noise": 8, "glare": 0.3, "perspective": 0.02, "exposure": 0.8}
+    result = bench_pipeline(frames=40, detector="component", degrade=degrade)
+    # 七段解码单独即可达到的下限，解码不可信的裁剪图交给 PaddleOCR 后只会更高
+    assert result["frame_chars"] >= 0.85
+    assert result["batch_chars"] >= 0.95
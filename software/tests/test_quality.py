@@ -0,0 +1,29 @@
+from detectors import ComponentDetector
+from preprocess import RedSegmentFilter
+from quality import FrameQualityGate, suggest_thresholds
+from synthetic import SyntheticMeters
+
+
+def channel_boxes(frame):
+    return ComponentDetector()(RedSegmentFilter()(frame))
+
+
+def test_suggested_thresholds_keep_good_frames_and_reject_degraded():
+    gate = FrameQualityGate()
+    reference = [gate.measure(frame, boxes=channel_boxes(frame)) for frame, _ in SyntheticMeters(seed=1).frames(20)]
+    tuned = FrameQualityGate(**suggest_thresholds(reference))
+    for frame, _ in SyntheticMeters(seed=2).frames(10):
+        assert tuned.check(frame, boxes=channel_boxes(frame))[0] is None
+    for frame, _ in SyntheticMeters(seed=3, blur=3.0).frames(5):
+        assert tuned.check(frame, boxes=channel_boxes(frame))[0] == "blur"
+    for frame, _ in SyntheticMeters(seed=4, exposure=0.2).frames(5):
+        assert tuned.check(frame, boxes=channel_boxes(frame))[0] == "dark"
+    assert tuned.stats()["checked"] == 20
+
+
+def test_channel_median_ignores_single_bad_channel():
+    frame, truth = SyntheticMeters(meters=4, seed=5).frame()
+    gate = FrameQualityGate(min_sharpness=50)
+    x, y = truth["boxes"][0][0].astype(int)
+    frame[y:y + 60, x:x + 200] = 0  # 一个通道被遮挡
+    assert gate.check(frame, boxes=truth["boxes"])[0] is None
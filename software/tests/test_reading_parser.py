@@ -0,0 +1,56 @@
+import pytest
+
+from reading_parser import ReadingParser, reference_parse_reading
+
+
+@pytest.mark.parametrize("text, digits, substitutions", [
+    ("12.34", b"1234", 0),
+    ("1,2 3.4", b"1234", 0),
+    ("lO.S6", b"1056", 3),
+    ("zB.qG", b"2896", 4),
+    ("-IT.tJ", b"-1771", 4),
+])
+def test_normalize_substitutions(text, digits, substitutions):
+    assert ReadingParser().normalize(text) == (digits, substitutions)
+
+
+def test_non_ascii_is_rejected():
+    assert ReadingParser().normalize("１２.３４") == (None, 0)
+    assert ReadingParser().parse("１２.３４") is None
+
+
+def test_default_decimals_follow_digit_count():
+    parser = ReadingParser()
+    assert parser.parse("123") == (1.23, 1.0)
+    assert parser.parse("12.34") == (12.34, 1.0)
+    assert parser.parse("12345") == (12345.0, 1.0)
+    assert parser.parse("abc") is None
+
+
+def test_substitution_lowers_confidence():
+    value, confidence = ReadingParser().parse("1O.OO", score=0.9)
+    assert value == 10.0
+    assert confidence == pytest.approx(0.9 * 0.8 ** 3)
+
+
+def test_channel_formats():
+    parser = ReadingParser(formats=[(4, 2), (3, 1), (5, 3)], channel_num=3)
+    assert parser.parse("12.34", channel=0) == (12.34, 1.0)
+    assert parser.parse("12.3", channel=1) == (12.3, 1.0)
+    assert parser.parse("-1.234", channel=2) is None  # 位数不符
+    assert parser.parse("12.345", channel=2) == (12.345, 1.0)
+    # 小数点位置由格式决定，识别出的小数点位置不影响读数
+    assert parser.parse("1.234", channel=0) == (12.34, 1.0)
+    assert parser.parse("123", channel=0) is None
+
+
+def test_single_format_applies_to_every_channel():
+    parser = ReadingParser(formats=(3, 1), channel_num=2)
+    assert parser.formats == [(3, 1), (3, 1)]
+    assert parser.parse("-45.6", channel=1) == (-45.6, 1.0)
+
+
+@pytest.mark.parametrize("text", ["12.34", "1.23", "O1.5S", "lz.Bq", "12345", "x1"])
+def test_matches_reference_without_formats(text):
+    parsed = ReadingParser().parse(text)
+    assert (parsed[0] if parsed else None) == reference_parse_reading(text)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from recognizer import paddleocr_recognize
+
+
+def make_crops(count):
+    return [np.full((48, 100, 3), index, dtype=np.uint8) for index in range(count)]
+
+
+class FakeTextRecognizer():
+    def __call__(self, crops):
+        return [(f"{int(crop[0, 0, 0])}.00", 0.9) for crop in crops], 0.01
+
+
+class FakeOcr():
+    """只有 ocr() 接口，per_image 为 True 时按 PaddleOCR 2.7+ 每张图返回一个列表"""
+
+    def __init__(self, per_image):
+        self.per_image = per_image
+
+    def ocr(self, crops, det=False, cls=False):
+        results = [(f"{int(crop[0, 0, 0])}.00", 0.9) for crop in crops]
+        if self.per_image:
+            return [[result] if index != 1 else None for index, result in enumerate(results)]
+        return [results]
+
+
+def test_text_recognizer_returns_one_result_per_crop():
+    ocr = type("Ocr", (), {"text_recognizer": FakeTextRecognizer()})()
+    results = paddleocr_recognize(ocr, make_crops(5))
+    assert results == [(f"{index}.00", 0.9) for index in range(5)]
+
+
+def test_batch_list_result():
+    results = paddleocr_recognize(FakeOcr(per_image=False), make_crops(4))
+    assert [text for text, _ in results] == ["0.00", "1.00", "2.00", "3.00"]
+
+
+def test_per_image_result_keeps_every_crop():
+    results = paddleocr_recognize(FakeOcr(per_image=True), make_crops(4))
+    assert len(results) == 4
+    assert results[0] == ("0.00", 0.9)
+    assert results[1] == ("", 0.0)
+    assert results[3] == ("3.00", 0.9)
+
+
+def test_empty_input():
+    assert paddleocr_recognize(FakeOcr(per_image=True), []) == []
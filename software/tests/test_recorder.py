@@ -0,0 +1,45 @@
+import csv
+import os
+
+import numpy as np
+
+from recorder import FrameRecorder
+
+
+def index_rows(folder):
+    with open(os.path.join(folder, "index.csv"), encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def frames(count):
+    return [np.full((48, 64, 3), index * 10, dtype=np.uint8) for index in range(count)]
+
+
+def test_avi_probe_frames_indexed_after_video_opens(tmp_path):
+    recorder = FrameRecorder(str(tmp_path), mode="avi", fps=25, probe_frames=5)
+    for index, frame in enumerate(frames(12)):
+        recorder.write(frame, timestamp=1 + index * 0.1)
+    stats = recorder.close()
+    rows = index_rows(tmp_path)
+    assert stats["written"] == 12 and stats["failed"] == 0
+    assert [int(row["position"]) for row in rows] == list(range(12))
+    assert stats["fps"] == 10.0  # 由缓存帧的时间戳间隔测得
+
+
+def test_avi_probe_frames_count_as_failed_when_video_cannot_open(tmp_path):
+    recorder = FrameRecorder(str(tmp_path), mode="avi", probe_frames=5)
+    recorder.video_path = str(tmp_path / "missing" / "video.avi")
+    for index, frame in enumerate(frames(8)):
+        recorder.write(frame, timestamp=1 + index * 0.1)
+    stats = recorder.close()
+    assert stats["written"] == 0 and stats["failed"] == 8
+    assert index_rows(tmp_path) == []
+
+
+def test_avi_short_recording_opens_video_on_close(tmp_path):
+    recorder = FrameRecorder(str(tmp_path), mode="avi", probe_frames=10)
+    for index, frame in enumerate(frames(3)):
+        recorder.write(frame, timestamp=1 + index * 0.2)
+    stats = recorder.close()
+    assert stats["written"] == 3 and len(index_rows(tmp_path)) == 3
+    assert stats["fps"] == 5.0
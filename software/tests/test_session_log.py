@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+import time
+
+from session_log import SessionLogger
+
+
+def read_records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_before_set_path_go_to_first_file(tmp_path):
+    logger = SessionLogger()
+    logger.info("预热完成", source="ocr")
+    logger.warning("回退到 PaddleOCR", source="backend")
+    path = str(tmp_path / "session.log")
+    logger.set_path(path)
+    logger.info("会话开始")
+    logger.flush()
+    logger.close()
+    assert [r["msg"] for r in read_records(path)] == ["预热完成", "回退到 PaddleOCR", "会话开始"]
+    assert logger.dropped == 0
+
+
+def test_level_filtering(tmp_path):
+    path = str(tmp_path / "session.log")
+    logger = SessionLogger(path=path, level="WARNING")
+    assert not logger.debug_enabled and not logger.enabled("INFO")
+    logger.debug("细节")
+    logger.info("普通")
+    logger.warning("警告")
+    logger.tagged("[ERROR] 出错", source="ocr")
+    logger.tagged("[PROFILE] 耗时")
+    logger.set_level("DEBUG")
+    logger.debug("调试")
+    logger.close()
+    records = read_records(path)
+    assert [(r["level"], r["msg"]) for r in records] == [("WARNING", "警告"), ("ERROR", "出错"), ("DEBUG", "调试")]
+    assert records[1]["tag"] == "ERROR" and records[1]["source"] == "ocr"
+
+
+def test_rotation_keeps_backups(tmp_path):
+    path = str(tmp_path / "session.log")
+    logger = SessionLogger(path=path, max_bytes=1000, backups=2)
+    for index in range(100):
+        logger.info(f"记录 {index:03d}")
+    logger.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["session.log", "session.log.1", "session.log.2"]
+    for name in ("session.log.1", "session.log.2"):
+        assert os.path.getsize(tmp_path / name) >= 1000
+    # 按从旧到新拼接各文件，应是最后若干条连续的记录
+    messages = [r["msg"] for name in ("session.log.2", "session.log.1", "session.log")
+                for r in read_records(str(tmp_path / name))]
+    assert messages == [f"记录 {index:03d}" for index in range(100 - len(messages), 100)]
+
+def test_close_does_not_hang_on_full_queue(tmp_path):
+    logger = SessionLogger(path=str(tmp_path / "session.log"), queue_size=2)
+    release = threading.Event()
+    logger._write = lambda path, record: release.wait()  # 模拟写入线程卡在慢磁盘上
+    for index in range(5):
+        logger.info(f"记录 {index}")
+    started = time.monotonic()
+    logger.close(timeout=0.2)
+    assert time.monotonic() - started < 1.0
+    assert logger.dropped >= 2
+    release.set()
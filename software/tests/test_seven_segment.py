@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from seven_segment import SevenSegmentDecoder, render_digits
+
+
+@pytest.mark.parametrize("digit", list("0123456789"))
+def test_decodes_every_digit(digit):
+    text, confidences = SevenSegmentDecoder().decode(render_digits(digit))
+    assert text == digit
+    assert min(confidences) >= 0.5
+
+
+@pytest.mark.parametrize("height", [32, 48, 64])
+def test_decodes_reading_with_decimal_point(height):
+    text, _ = SevenSegmentDecoder().decode(render_digits("10.57", height=height))
+    assert text == "10.57"
+
+
+@pytest.mark.parametrize("text", ["1", "11", "1.23", "71.1", "-12"])
+def test_narrow_one_is_right_aligned(text):
+    # "1" 只点亮 b/c 两段，列宽只有笔画粗细
+    assert SevenSegmentDecoder().decode(render_digits(text))[0] == text
+
+
+def test_read_counts_decoded_and_fallback():
+    decoder = SevenSegmentDecoder()
+    assert decoder.read(render_digits("42.00")) == ("42.00", pytest.approx(0.85, abs=0.1))
+    blob = np.zeros((52, 40), dtype=np.uint8)
+    blob[2:50, 4:36] = 255  # 整块红色干扰点亮了段间空洞
+    assert decoder.read(blob) is None
+    assert decoder.read(np.zeros((52, 40), dtype=np.uint8)) is None
+    assert (decoder.decoded, decoder.fallback) == (1, 2)